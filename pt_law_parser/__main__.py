@@ -0,0 +1,58 @@
+"""
+Converts PDF documents to HTML in batch:
+
+    python -m pt_law_parser [-o OUTPUT_DIR] [-p PROCESSES] [-c CACHE_DIR]
+                            [-l LIST] PATH ...
+"""
+import argparse
+import sys
+
+from pt_law_parser.batch import find_documents, convert_documents
+from pt_law_parser.cache import DocumentCache
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m pt_law_parser',
+        description='Converts official PDFs of the portuguese law to HTML.')
+    parser.add_argument('paths', nargs='*', metavar='PATH',
+                        help='a PDF document or a directory with documents.')
+    parser.add_argument('-l', '--list', action='append', default=[],
+                        metavar='LIST',
+                        help='a file with one path per line.')
+    parser.add_argument('-o', '--output', metavar='OUTPUT_DIR',
+                        help='directory of the HTML files (default: next to '
+                             'each document).')
+    parser.add_argument('-p', '--processes', type=int, default=None,
+                        help='number of worker processes (default: number '
+                             'of CPUs).')
+    parser.add_argument('-c', '--cache', metavar='CACHE_DIR',
+                        help='directory of a cache of parsed documents, '
+                             'shared by the processes.')
+    arguments = parser.parse_args(argv)
+
+    paths = list(arguments.paths)
+    for list_file_name in arguments.list:
+        with open(list_file_name) as f:
+            paths.extend(line.strip() for line in f if line.strip())
+
+    if not paths:
+        parser.error('no documents to convert.')
+
+    def report_failure(file_name, pages, error):
+        if error is not None:
+            sys.stderr.write('%s: %s\n' % (file_name, error))
+
+    cache = None
+    if arguments.cache is not None:
+        cache = DocumentCache(arguments.cache)
+
+    report = convert_documents(find_documents(paths), arguments.output,
+                               arguments.processes, report_failure, cache)
+    sys.stdout.write('%s\n' % report)
+
+    return 1 if report.failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
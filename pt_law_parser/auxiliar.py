@@ -1,3 +1,7 @@
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+
+
 def int_round(x, base=1):
     return int(base * round(float(x)/base))
 
@@ -8,3 +12,64 @@ def eq(value1, value2, epsilon):
 
 def middle_x(bbox):
     return (bbox[0] + bbox[2])/2.
+
+
+def overlapped_slots(borders, x0, x1):
+    """
+    Returns the indexes i of the slots [borders[i], borders[i + 1]] of the
+    sorted `borders` that overlap [x0, x1] (borders included).
+    """
+    first = max(bisect_left(borders, x0) - 1, 0)
+    last = min(bisect_right(borders, x1) - 1, len(borders) - 2)
+    return range(first, last + 1)
+
+
+class GridIndex(object):
+    """
+    Indexes boxes by the slots of a grid they cover, to find the boxes that may
+    overlap a given box without testing all of them.
+
+    The grid is formed by the sorted `x_borders` and `y_borders` (by default,
+    the borders of the boxes). Boxes not aligned with the grid are always
+    candidates.
+    """
+    def __init__(self, bboxes, x_borders=None, y_borders=None):
+        bboxes = list(bboxes)
+        if x_borders is None:
+            x_borders = sorted(set(x for bbox in bboxes for x in bbox[0::2]))
+        if y_borders is None:
+            y_borders = sorted(set(y for bbox in bboxes for y in bbox[1::2]))
+        self._x_borders = x_borders
+        self._y_borders = y_borders
+
+        self._slots = defaultdict(list)
+        self._unindexed = []
+
+        x_borders_set = set(x_borders)
+        y_borders_set = set(y_borders)
+        for position, (x0, y0, x1, y1) in enumerate(bboxes):
+            if not (x0 < x1 and y0 < y1 and
+                    x0 in x_borders_set and x1 in x_borders_set and
+                    y0 in y_borders_set and y1 in y_borders_set):
+                self._unindexed.append(position)
+                continue
+
+            columns = range(bisect_left(x_borders, x0),
+                            bisect_left(x_borders, x1))
+            for row in range(bisect_left(y_borders, y0),
+                             bisect_left(y_borders, y1)):
+                for column in columns:
+                    self._slots[(row, column)].append(position)
+
+    def candidates(self, bbox):
+        """
+        Returns the sorted positions of the boxes that may overlap `bbox`
+        (borders included). Every box that overlaps it is returned.
+        """
+        x0, y0, x1, y1 = bbox
+        positions = set(self._unindexed)
+        columns = overlapped_slots(self._x_borders, x0, x1)
+        for row in overlapped_slots(self._y_borders, y0, y1):
+            for column in columns:
+                positions.update(self._slots.get((row, column), ()))
+        return sorted(positions)
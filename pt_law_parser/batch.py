@@ -0,0 +1,139 @@
+import os
+import time
+from multiprocessing import Pool, cpu_count
+
+from pt_law_parser.parser import parse_document
+
+
+def find_documents(paths):
+    """
+    Returns the PDF documents in `paths`, searching directories recursively.
+    """
+    documents = []
+    for path in paths:
+        if not os.path.isdir(path):
+            documents.append(path)
+            continue
+        for directory, _, file_names in sorted(os.walk(path)):
+            for file_name in sorted(file_names):
+                if file_name.lower().endswith('.pdf'):
+                    documents.append(os.path.join(directory, file_name))
+    return documents
+
+
+def output_file_name(file_name, output_dir=None):
+    """
+    Returns the name of the HTML file of the document `file_name`. Without
+    `output_dir`, it is placed next to the document. Documents with the same
+    name (e.g. in different directories) have the same file in `output_dir`.
+    """
+    if output_dir is None:
+        return file_name + '.html'
+    return os.path.join(output_dir, os.path.basename(file_name) + '.html')
+
+
+def convert_document(file_name, output_dir=None, cache=None):
+    """
+    Converts the document to HTML and returns the number of pages processed.
+    """
+    device = parse_document(file_name, cache=cache)
+
+    with open(output_file_name(file_name, output_dir), 'w') as f:
+        device.write_html(f)
+
+    return device.pageno - 1
+
+
+def _convert_document(arguments):
+    """
+    Converts a document within a process of `convert_documents`, returning the
+    failure instead of raising it so that a document does not stop the batch.
+    """
+    file_name, output_dir, cache = arguments
+    try:
+        return file_name, convert_document(file_name, output_dir, cache), None
+    except Exception as error:
+        return file_name, 0, '%s: %s' % (error.__class__.__name__, error)
+
+
+class BatchReport(object):
+    """
+    Accumulates the results of a batch conversion and its throughput.
+    """
+    def __init__(self):
+        self.documents = 0
+        self.pages = 0
+        self.failures = []
+        self._start = time.time()
+
+    def add(self, file_name, pages, error):
+        if error is None:
+            self.documents += 1
+            self.pages += pages
+        else:
+            self.failures.append((file_name, error))
+
+    @property
+    def elapsed(self):
+        return time.time() - self._start
+
+    def __str__(self):
+        elapsed = max(self.elapsed, 1e-6)
+        return 'Converted %d documents (%d pages) in %.1fs: %.2f docs/s, ' \
+               '%.2f pages/s; %d failed.' % (
+                   self.documents, self.pages, elapsed,
+                   self.documents/elapsed, self.pages/elapsed,
+                   len(self.failures))
+
+
+def convert_documents(file_names, output_dir=None, processes=None,
+                      callback=None, cache=None):
+    """
+    Converts the documents to HTML in a pool of `processes` processes
+    (by default, one per CPU) and returns a `BatchReport`.
+
+    `callback(file_name, pages, error)` is called after each document. The
+    processes share the `DocumentCache` `cache`, if any.
+
+    A document whose HTML file is the one of a previous document (see
+    `output_file_name`) is not converted and is reported as a failure.
+    """
+    if processes is None:
+        processes = cpu_count()
+
+    if output_dir is not None and not os.path.isdir(output_dir):
+        os.makedirs(output_dir)
+
+    report = BatchReport()
+
+    def add(file_name, pages, error):
+        report.add(file_name, pages, error)
+        if callback is not None:
+            callback(file_name, pages, error)
+
+    arguments = []
+    outputs = {}  # absolute name of the HTML file -> document
+    for file_name in file_names:
+        output = os.path.abspath(output_file_name(file_name, output_dir))
+        if output in outputs:
+            add(file_name, 0, 'its HTML file %s is the one of %s' %
+                (output, outputs[output]))
+            continue
+        outputs[output] = file_name
+        arguments.append((file_name, output_dir, cache))
+
+    if processes > 1:
+        pool = Pool(processes)
+        results = pool.imap_unordered(_convert_document, arguments)
+    else:
+        pool = None
+        results = (_convert_document(argument) for argument in arguments)
+
+    try:
+        for file_name, pages, error in results:
+            add(file_name, pages, error)
+    finally:
+        if pool is not None:
+            pool.terminate()
+
+    return report
@@ -0,0 +1,209 @@
+import cPickle as pickle
+import errno
+import hashlib
+import os
+import tempfile
+import time
+
+from pdfminer.pdftypes import PDFObjRef, PDFStream
+from pdfminer.psparser import PSKeyword, PSLiteral
+
+from pt_law_parser import __version__
+
+
+class DocumentCache(object):
+    """
+    A cache of parsed documents in the directory `directory`, keyed by the hash
+    of the bytes of the document and the version of the package (see `key`).
+    It also caches the analysis of pages, keyed by `page_key`.
+
+    Because entries are only identified by the version, `__version__` must be
+    bumped by any change to the result of the parser (or to the pickled
+    classes); otherwise the cache returns the result of the old parser.
+
+    It holds at most `max_size` bytes; the least recently used entries are
+    evicted first. Entries are written to a temporary file and renamed, so
+    processes can share the cache without reading partial entries.
+
+    The size of the cache is estimated from the entries written, and the
+    directory is only scanned when the estimate exceeds `max_size` or every
+    `SCAN_EVERY` writes (to account for the writes of other processes).
+    """
+    SUFFIX = '.pickle'
+    TEMPORARY_SUFFIX = '.tmp'
+    SCAN_EVERY = 64
+    # age in seconds after which a temporary file is from a writer that died.
+    TEMPORARY_MAX_AGE = 60*60
+
+    def __init__(self, directory, max_size=512*1024*1024):
+        self.directory = directory
+        self.max_size = max_size
+
+        # the estimated size of the cache; None until the directory is scanned.
+        self._size = None
+        self._writes = 0
+
+        try:
+            os.makedirs(directory)
+        except OSError as error:
+            if error.errno != errno.EEXIST:
+                raise
+
+    @staticmethod
+    def key(file_name):
+        """
+        Returns the key of the document `file_name`.
+        """
+        digest = hashlib.sha256(__version__ + '\0')
+        with open(file_name, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 16), ''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + self.SUFFIX)
+
+    def get(self, key):
+        """
+        Returns the value of `key`, or None if it is not in the cache.
+        """
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+        except Exception:
+            # an entry that does not exist or cannot be loaded is a miss; it is
+            # overwritten by the next `set`.
+            return None
+
+        # the modification time is the time of the last use.
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return value
+
+    def set(self, key, value):
+        """
+        Stores `value` in `key` and evicts entries to keep the cache within
+        `max_size`.
+        """
+        fd, temporary_path = tempfile.mkstemp(dir=self.directory,
+                                              suffix=self.TEMPORARY_SUFFIX)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(value, f, pickle.HIGHEST_PROTOCOL)
+                size = f.tell()
+            os.rename(temporary_path, self._path(key))
+        except:
+            os.remove(temporary_path)
+            raise
+
+        self._writes += 1
+        if self._size is not None:
+            # overwriting an entry over-estimates the size, which only makes
+            # the next scan earlier.
+            self._size += size
+        if self._size is None or self._size > self.max_size or \
+                self._writes >= self.SCAN_EVERY:
+            self._evict()
+
+    def _entries(self):
+        """
+        Returns the (last use, size, path) of the entries of the cache and
+        removes the temporary files left by writers that died.
+        """
+        entries = []
+        stale_time = time.time() - self.TEMPORARY_MAX_AGE
+        for name in os.listdir(self.directory):
+            is_temporary = name.endswith(self.TEMPORARY_SUFFIX)
+            if not is_temporary and not name.endswith(self.SUFFIX):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+                if is_temporary:
+                    if stat.st_mtime < stale_time:
+                        os.remove(path)
+                    continue
+            except OSError:
+                continue  # evicted by another process
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _evict(self):
+        entries = sorted(self._entries())
+        size = sum(entry[1] for entry in entries)
+        for _, entry_size, path in entries:
+            if size <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass  # evicted by another process
+            size -= entry_size
+
+        self._size = size
+        self._writes = 0
+
+
+def _object_hash(obj, hashes):
+    digest = hashlib.sha256()
+    _update(digest, obj, hashes)
+    return digest.hexdigest()
+
+
+def _update(digest, obj, hashes):
+    """
+    Updates the digest with the PDF object `obj`, resolving its references.
+    `hashes` maps the ids of the objects already hashed to their hash.
+    """
+    if isinstance(obj, PDFObjRef):
+        if obj.objid not in hashes:
+            hashes[obj.objid] = None  # a reference to itself is not followed
+            hashes[obj.objid] = _object_hash(obj.resolve(), hashes)
+        digest.update('ref:%s;' % hashes[obj.objid])
+    elif isinstance(obj, PDFStream):
+        digest.update('stream:')
+        _update(digest, obj.attrs, hashes)
+        # the stream is not decoded: pdfminer cannot decode all filters (e.g.
+        # images in /DCTDecode), and decoding is not needed to identify it.
+        if obj.rawdata is not None:
+            data = obj.rawdata
+            digest.update('raw:')
+        else:
+            data = obj.data
+            digest.update('decoded:')
+        digest.update('%d:' % len(data))
+        digest.update(data)
+    elif isinstance(obj, dict):
+        digest.update('dict:%d:' % len(obj))
+        for key in sorted(obj):
+            digest.update('%r:' % key)
+            _update(digest, obj[key], hashes)
+    elif isinstance(obj, (list, tuple)):
+        digest.update('list:%d:' % len(obj))
+        for item in obj:
+            _update(digest, item, hashes)
+    elif isinstance(obj, (PSLiteral, PSKeyword)):
+        digest.update('name:%r;' % obj.name)
+    else:
+        digest.update('%r;' % obj)
+
+
+def page_key(page, hashes=None):
+    """
+    Returns the key of the `PDFPage` `page`: a hash of its content streams,
+    resources and geometry, and the version of the package. Identical pages of
+    different documents have the same key.
+
+    `hashes` stores the hashes of the objects of the document referenced by
+    the page, so that objects shared by pages (e.g. fonts) are hashed once.
+    """
+    if hashes is None:
+        hashes = {}
+    digest = hashlib.sha256(__version__ + '\0page\0')
+    _update(digest, [page.mediabox, page.cropbox, page.rotate], hashes)
+    _update(digest, page.contents, hashes)
+    _update(digest, page.resources, hashes)
+    return digest.hexdigest()
@@ -4,15 +4,19 @@ from pdfminer.layout import LTTextGroup, LAParams, LTLine, LTRect, LTFigure, \
 from pdfminer.converter import PDFLayoutAnalyzer
 from pdfminer.utils import apply_matrix_pt
 
-from pt_law_parser.layout import LTNetwork, LTPageLayout
+from pt_law_parser import validation
+from pt_law_parser.layout import LTNetwork, LTPageLayout, LTTextHeader
 from pt_law_parser.point import Point
 from pt_law_parser.html import Paragraph, Header, Table, SimpleImage, \
     BlockquoteStart, BlockquoteEnd
 from pt_law_parser.meta import Meta
-from pt_law_parser.auxiliar import eq, int_round, middle_x
+from pt_law_parser.auxiliar import eq, int_round, middle_x, GridIndex
+from pt_law_parser.cache import page_key
 
 
 HEADER_MIN_Y = 775
+# the baselines of headers of older documents are slightly below HEADER_MIN_Y.
+HEADER_BASELINE_MIN_Y = HEADER_MIN_Y - 15
 MIDDLE_X1 = (292 + 306.0)/2
 
 
@@ -20,6 +24,42 @@ def crosses_middle(line):
     return line.x0 < MIDDLE_X1 < line.x1
 
 
+class ParametersProfile(object):
+    """
+    The parameters of a document, resolved once from its meta information by
+    `ConverterParameters.profile`. It is immutable.
+    """
+    __slots__ = ('citing_space', 'paragraph_spaces', 'subparagraph_spaces',
+                 'sub_line_spaces', 'left_column_x', 'right_column_x')
+
+    def __init__(self, **parameters):
+        for name in self.__slots__:
+            object.__setattr__(self, name, parameters[name])
+
+    def __setattr__(self, name, value):
+        raise AttributeError('ParametersProfile is immutable')
+
+    @staticmethod
+    def _matches(offset, spaces):
+        for space in spaces:
+            if eq(offset, space, 2):
+                return True
+        return False
+
+    def is_paragraph(self, offset):
+        """
+        Checks if a line `offset` from the start of a line without paragraph
+        is a paragraph.
+        """
+        return self._matches(offset, self.paragraph_spaces)
+
+    def is_subparagraph(self, offset):
+        return self._matches(offset, self.subparagraph_spaces)
+
+    def is_subparagraph_line(self, offset):
+        return self._matches(offset, self.sub_line_spaces)
+
+
 class ConverterParameters(object):
     """
     This class is responsible for providing document-dependent parameters.
@@ -47,6 +87,33 @@ class ConverterParameters(object):
                        2002: (29.48, 34.843),
                        'v2': (34.844, 31.98)}
 
+    _RIGHT_COLUMN_X = {2014: (306, 547.4),
+                       2013: (306, 547.4),
+                       2012: (306, 547.4),
+                       2010: (306, 547.4),
+                       2002: (301.178, 540.1),
+                       2001: (301.178, 540.1),
+                       2000: (301.178, 540.1),
+                       1999: (301.178, 540.1),
+                       1998: (315.344, 554.144),
+                       1997: (303, 533),
+                       }
+
+    _LEFT_COLUMN_X = {2014: (50.26, 291.74),
+                      2013: (50.26, 291.74),
+                      2012: (50.26, 291.74),
+                      2010: (50.26, 291.74),
+                      2002: (45.34, 284.14),
+                      2001: (45.34, 284.14),
+                      2000: (45.34, 284.14),
+                      1999: (45.34, 284.14),
+                      1998: (59.528, 298.278),
+                      1997: (57.65, 286.95),
+                      }
+
+    def __init__(self):
+        self._profiles = {}
+
     @staticmethod
     def _get_parameters(meta, parameters_dict):
         """
@@ -59,94 +126,117 @@ class ConverterParameters(object):
         else:
             return parameters_dict[None]
 
-    def citing_space(self, meta):
-        return self._get_parameters(meta, self._CITING_SPACE)
+    def profile(self, meta):
+        """
+        Returns the `ParametersProfile` of the meta, resolved once per year and
+        version.
+        """
+        key = (meta.year, meta.version)
+        if key not in self._profiles:
+            subparagraph_spaces = self._get_parameters(
+                meta, self._SUBPARAGRAPH_SPACE)
+            self._profiles[key] = ParametersProfile(
+                citing_space=self._get_parameters(meta, self._CITING_SPACE),
+                paragraph_spaces=self._get_parameters(
+                    meta, self._PARAGRAPH_SPACE) + subparagraph_spaces,
+                subparagraph_spaces=subparagraph_spaces,
+                sub_line_spaces=self._get_parameters(
+                    meta, self._SUB_LINE_SPACE),
+                left_column_x=self.left_column_x(meta),
+                right_column_x=self.right_column_x(meta))
+        return self._profiles[key]
 
-    def _paragraph_spaces(self, meta):
-        return self._get_parameters(meta, self._PARAGRAPH_SPACE) +\
-            self._get_parameters(meta, self._SUBPARAGRAPH_SPACE)
+    def citing_space(self, meta):
+        return self.profile(meta).citing_space
 
     def is_paragraph(self, meta, line, no_paragraph_x0):
-        is_paragraph = False
-        for paragraph_space in self._paragraph_spaces(meta):
-            is_paragraph = is_paragraph or \
-                eq(line.x0 - no_paragraph_x0, paragraph_space, 2)
-
-        return is_paragraph
+        return self.profile(meta).is_paragraph(line.x0 - no_paragraph_x0)
 
     def is_subparagraph(self, meta, line, no_paragraph_x0):
-        is_sub_paragraph = False
-        for space in self._get_parameters(meta, self._SUBPARAGRAPH_SPACE):
-            is_sub_paragraph = is_sub_paragraph or \
-                eq(line.x0 - no_paragraph_x0, space, 2)
-        return is_sub_paragraph
+        return self.profile(meta).is_subparagraph(line.x0 - no_paragraph_x0)
 
     def is_subparagraph_line(self, meta, line, no_paragraph_x0):
-        is_sub_line = False
-        for space in self._get_parameters(meta, self._SUB_LINE_SPACE):
-            is_sub_line = is_sub_line or \
-                eq(line.x0 - no_paragraph_x0, space, 2)
-        return is_sub_line
+        return self.profile(meta).is_subparagraph_line(line.x0 - no_paragraph_x0)
 
     @staticmethod
     def right_column_x(meta):
-        data = {2014: (306, 547.4),
-                2013: (306, 547.4),
-                2012: (306, 547.4),
-                2010: (306, 547.4),
-                2002: (301.178, 540.1),
-                2001: (301.178, 540.1),
-                2000: (301.178, 540.1),
-                1999: (301.178, 540.1),
-                1998: (315.344, 554.144),
-                1997: (303, 533),
-                }
-        if meta.year in data:
-            return data[meta.year]
-        else:
-            return 306, 547.4
+        return ConverterParameters._RIGHT_COLUMN_X.get(meta.year, (306, 547.4))
 
     @staticmethod
     def left_column_x(meta):
-        data = {2014: (50.26, 291.74),
-                2013: (50.26, 291.74),
-                2012: (50.26, 291.74),
-                2010: (50.26, 291.74),
-                2002: (45.34, 284.14),
-                2001: (45.34, 284.14),
-                2000: (45.34, 284.14),
-                1999: (45.34, 284.14),
-                1998: (59.528, 298.278),
-                1997: (57.65, 286.95),
-                }
-        if meta.year in data:
-            return data[meta.year]
-        else:
-            return 50.26, 291.74
+        return ConverterParameters._LEFT_COLUMN_X.get(meta.year,
+                                                      (50.26, 291.74))
+
+
+class LineFeatures(object):
+    """
+    The features of a line relative to a column that are used to classify it
+    (e.g. as a title or a paragraph).
+    """
+    def __init__(self, is_paragraph, is_subparagraph, is_subparagraph_line,
+                 is_full_width, is_column_centered, is_bold):
+        self.is_paragraph = is_paragraph
+        self.is_subparagraph = is_subparagraph
+        self.is_subparagraph_line = is_subparagraph_line
+        self.is_full_width = is_full_width
+        self.is_column_centered = is_column_centered
+        self.is_bold = is_bold
+
+
+class PageAnalysis(object):
+    """
+    The page-local result of the analysis of a page: the tables created from it
+    and its layout (None when the page has no content).
+
+    It does not depend on the previous pages, which means that pages can be
+    analysed independently (e.g. in different processes) and stitched in order
+    afterwards (see `LawConverter.stitch_page`).
+    """
+    def __init__(self, tables, layout):
+        self.tables = tables
+        self.layout = layout
 
 
 class LawConverter(PDFLayoutAnalyzer):
     """
     The main parser of a page. It is a state machine between pages, and
     is able to parse a single page.
+
+    With a `DocumentCache` `page_cache`, pages processed with `process_page`
+    reuse the `PageAnalysis` of identical pages analysed before.
     """
-    def __init__(self, rsrcmgr, pageno=1, laparams=None):
+    def __init__(self, rsrcmgr, pageno=1, laparams=None, page_cache=None):
         PDFLayoutAnalyzer.__init__(self, rsrcmgr, pageno=pageno, laparams=laparams)
 
         self._parameters = ConverterParameters()
 
+        self.page_cache = page_cache
+        # the key of the page being processed, when it is to be cached.
+        self._page_key = None
+        # the hashes of the objects of the document (see `page_key`).
+        self._object_hashes = {}
+
         # attributes result of the parsing
         self.meta = Meta()
+        # the parameters of the document, resolved each time the meta changes.
+        self._profile = self._parameters.profile(self.meta)
         self._titles = []
         self._all_tables = []
 
         # intermediary results
         self._result_lines = []
+        self._paragraphs = []
+        # the tables and images in `_result_lines`, by identity.
+        self._result_items = {}
 
         # attributes reset on each new page
         self._tables = []
         self._images = []
 
+        # the `LineFeatures` of the lines of the column being classified.
+        self._features_column = None
+        self._features = {}
+
         # state of the device across pages
         self.previous_line = None
         self._is_citing = False
@@ -157,35 +247,75 @@ class LawConverter(PDFLayoutAnalyzer):
 
     @property
     def paragraphs(self):
-        return [p for p in self._result_lines if isinstance(p, Paragraph) and not
-                isinstance(p, Header)]
+        return self._paragraphs
 
     @property
     def tables(self):
         return self._all_tables
 
-    def as_html(self):
-
+    def iter_html(self):
+        """
+        Yields the HTML of the document in chunks, element by element.
+        """
         meta = u'<meta http-equiv="Content-Type" ' \
                u'content="text/html; ' \
                u'charset=UTF-8">'
-        head = u'<head>\n{meta}\n</head>\n'.format(meta=meta)
+        yield u'<html>\n<head>\n{meta}\n</head>\n<body>\n'.format(meta=meta)
+
+        for line in self._result_lines:
+            if isinstance(line, Table):
+                for chunk in line.iter_html():
+                    yield chunk
+                yield u'\n'
+            else:
+                yield u'%s\n' % line.as_html()
 
-        body = u''.join(u'%s\n' % line.as_html() for line in self._result_lines)
+        yield u'</body>\n</html>\n'
 
-        return u'<html>\n{head}<body>\n{body}</body>\n</html>\n'.format(
-            header=u'<html>\n<head>\n', head=head, body=body)
+    def write_html(self, f, encoding='utf-8'):
+        """
+        Writes the HTML of the document to the file-like object `f` without
+        building it in memory.
+        """
+        for chunk in self.iter_html():
+            f.write(chunk.encode(encoding))
+
+    def as_html(self):
+        return u''.join(self.iter_html())
 
     @property
     def result(self):
         return self._result_lines
 
+    def line_features(self, line, column):
+        """
+        Returns the `LineFeatures` of the line in the column. They are computed
+        once per line while the column and the citing state do not change.
+        """
+        if column is not self._features_column:
+            self._features_column = column
+            self._features = {}
+
+        # the line itself (hashed by identity) is the key, so the memo keeps it
+        # alive and never returns the features of another line.
+        key = (line, self._is_citing)
+        if key not in self._features:
+            citing_space = self.citing_space(column)
+            offset = line.x0 - (column.x0 + citing_space)
+            self._features[key] = LineFeatures(
+                self._profile.is_paragraph(offset),
+                self._profile.is_subparagraph(offset),
+                self._profile.is_subparagraph_line(offset),
+                eq(line.width + citing_space, column.width, 4),
+                eq(middle_x(column.bbox) + citing_space, middle_x(line.bbox), 2),
+                'Bold' in line[0].fontname)
+        return self._features[key]
+
     def is_paragraph(self, line, column):
         """
         Checks if line is a new paragraph
         """
-        no_paragraph_x0 = column.x0 + self.citing_space(column)
-        return self._parameters.is_paragraph(self.meta, line, no_paragraph_x0) and\
+        return self.line_features(line, column).is_paragraph and \
             not self.is_line(line, column)
 
     def is_line(self, line, column):
@@ -200,17 +330,10 @@ class LawConverter(PDFLayoutAnalyzer):
         Special conditions to exclude what is text but would otherwise be
         interpreted as a title.
         """
-        previous_is_sub_paragraph = self._parameters.is_subparagraph(
-            self.meta, self.previous_line, column.x0 + self.citing_space(column))
-
-        previous_is_sub_line = self._parameters.is_subparagraph_line(
-            self.meta, self.previous_line, column.x0 + self.citing_space(column))
+        previous = self.line_features(self.previous_line, column)
 
-        is_sub_line = self._parameters.is_subparagraph_line(
-            self.meta, line, column.x0 + self.citing_space(column))
-
-        return (previous_is_sub_paragraph or previous_is_sub_line) and \
-            is_sub_line
+        return (previous.is_subparagraph or previous.is_subparagraph_line) and \
+            self.line_features(line, column).is_subparagraph_line
 
     @staticmethod
     def is_page_centered(line):
@@ -220,28 +343,87 @@ class LawConverter(PDFLayoutAnalyzer):
         """
         Checks if line is centered (i.e. a section title, etc.)
         """
-        center_x = middle_x(column.bbox) + self.citing_space(column)
-        return eq(center_x, middle_x(line.bbox), 2)
+        return self.line_features(line, column).is_column_centered
 
     def is_full_width(self, line, column):
-        return eq(line.width + self.citing_space(column), column.width, 4)
+        return self.line_features(line, column).is_full_width
 
     def is_title(self, line, column):
-        is_full_width = self.is_full_width(line, column)
+        features = self.line_features(line, column)
 
-        return (self.is_column_centered(line, column) and
-                not (is_full_width or self.is_paragraph(line, column)) and
-                not self._is_text(line, column)) or 'Bold' in line[0].fontname
+        return (features.is_column_centered and
+                not (features.is_full_width or
+                     self.is_paragraph(line, column)) and
+                not self._is_text(line, column)) or features.is_bold
 
     def citing_space(self, column):
         # the citing space of centered columns is always 0.
         if crosses_middle(column):
             return 0
 
-        return self._parameters.citing_space(self.meta)*self._is_citing
+        return self._profile.citing_space*self._is_citing
 
     def add(self, element):
         self._result_lines.append(element)
+        if isinstance(element, Paragraph) and not isinstance(element, Header):
+            self._paragraphs.append(element)
+
+    def result_state(self):
+        """
+        Returns the result of the parsing as a picklable object, which
+        `restore_result` restores on another device (e.g. to cache it).
+        """
+        return {'meta': self.meta,
+                'titles': self._titles,
+                'tables': self._all_tables,
+                'result': self._result_lines,
+                'pageno': self.pageno}
+
+    def restore_result(self, state):
+        """
+        Restores the result of a parsing returned by `result_state`.
+        """
+        self.meta = state['meta']
+        self._profile = self._parameters.profile(self.meta)
+        self._titles = state['titles']
+        self._all_tables = state['tables']
+        self._result_lines = []
+        self._paragraphs = []
+        self._result_items = {}
+        for element in state['result']:
+            if isinstance(element, (Table, SimpleImage)):
+                self._result_items[id(element)] = element
+            self.add(element)
+        self.pageno = state['pageno']
+
+    def pop_result(self, final=False):
+        """
+        Removes and returns the elements of the result that are final, i.e.
+        all but the last one, which the next line may still be merged to. With
+        `final`, all elements are returned (i.e. the document has ended).
+
+        The device drops its references to the returned elements: they are no
+        longer in `result`, `titles`, `paragraphs` or `tables`.
+        """
+        if final:
+            result, self._result_lines = self._result_lines, []
+        else:
+            result = self._result_lines[:-1]
+            self._result_lines = self._result_lines[-1:]
+
+        # keep the title and table of the last element, if it was kept.
+        if self._result_lines and isinstance(self._result_lines[-1], Header):
+            self._titles = self._titles[-1:]
+        else:
+            self._titles = []
+        self._all_tables = [table for table in self._all_tables
+                            if table in self._result_lines]
+        self._paragraphs = [paragraph for paragraph in self._paragraphs[-1:]
+                            if paragraph in self._result_lines]
+        self._result_items = dict(
+            (key, item) for key, item in self._result_items.items()
+            if item in self._result_lines)
+        return result
 
     def add_header(self, line):
         self.add(Header(line.get_text()))
@@ -250,13 +432,19 @@ class LawConverter(PDFLayoutAnalyzer):
     def add_paragraph(self, line):
         self.add(Paragraph(line.get_text()))
 
+    def _add_item(self, item):
+        """
+        Adds a table or image to the result, unless it was already added.
+        """
+        if id(item) not in self._result_items:
+            self._result_items[id(item)] = item
+            self.add(item)
+
     def add_table(self, table):
-        if table not in self._result_lines:
-            self.add(table)
+        self._add_item(table)
 
     def add_image(self, image):
-        if image not in self._result_lines:
-            self.add(image)
+        self._add_item(image)
 
     def merge(self, line):
         if isinstance(self._result_lines[-1], SimpleImage):
@@ -350,17 +538,16 @@ class LawConverter(PDFLayoutAnalyzer):
             return False
 
     def _create_tables(self, items):
+        """
+        Creates the tables of the page from its networks and returns them.
+        """
         self._tables = []
         _network = LTNetwork()
 
         # merge all LTNetworks in a single network _network.
         for item in items:
             if isinstance(item, LTNetwork):
-                for point in item.points:
-                    _network.add_point(point)
-                    for link in item.links[point]:
-                        _network.add_point(link)
-                        _network.add_link(point, link)
+                _network.update(item)
 
         networks = _network.create_components()
 
@@ -369,16 +556,24 @@ class LawConverter(PDFLayoutAnalyzer):
             try:
                 table = Table(network)
                 self._tables.append(table)
-                self._all_tables.append(table)
             except Table.EmptyTableError:
                 pass
 
+        # the networks come in no particular order: sort the tables in reading
+        # order (left and centered tables first, from top to bottom).
+        self._tables.sort(key=lambda table: (MIDDLE_X1 < table.x0, -table.y1))
+
+        return self._tables
+
     def _build_layout(self, lines, header_min_y, last_page_limit):
         layout = LTPageLayout()
 
+        tables_index = GridIndex(table.bbox for table in self._tables)
+
         def in_table(line):
             # check if text is inside table and add it to it if yes.
-            for table in self._tables:
+            for position in tables_index.candidates(line.bbox):
+                table = self._tables[position]
                 if table.hoverlap(line) and table.voverlap(line):
                     table.add(line)
                     return True
@@ -414,20 +609,25 @@ class LawConverter(PDFLayoutAnalyzer):
             layout.add(image)
 
         layout.analyze()
-        layout.assert_non_overlapping()
+        if validation.is_enabled(validation.CHEAP):
+            layout.assert_non_overlapping()
 
         return layout
 
-    def receive_layout(self, ltpage):
+    def analyze_page(self, ltpage):
+        """
+        Returns the `PageAnalysis` of the page or None if the page is to be
+        ignored. This does not change the state of the device across pages.
+        """
         if not len(ltpage) or not isinstance(ltpage[0], LTTextBox):
             # No text => ignore.
-            return
+            return None
         lines = ltpage[0]
         items = ltpage[1:]
 
         # summary page => ignore.
         if self._is_summary_page(items):
-            return
+            return None
 
         # the y0 which defines the limit of content of a last page
         last_page_limit = self._last_page_limit(items)
@@ -436,26 +636,74 @@ class LawConverter(PDFLayoutAnalyzer):
 
         # header is below the last page limit => empty last page => ignore.
         if last_page_limit > header_min_y:
-            return
+            return None
 
         self._images = [SimpleImage(item[0]) for item in items
                         if isinstance(item, LTFigure)]
-        self._create_tables(items)
+        tables = self._create_tables(items)
 
         layout = self._build_layout(lines, header_min_y, last_page_limit)
 
         if layout.is_empty():
-            # Page with no content => ignore.
+            # Page with no content => no layout.
+            layout = None
+
+        return PageAnalysis(tables, layout)
+
+    def stitch_page(self, page):
+        """
+        Adds the `PageAnalysis` of the next page to the result, updating the
+        state of the device across pages.
+        """
+        self._all_tables.extend(page.tables)
+
+        layout = page.layout
+        if layout is None:
             return
 
         self.meta.parse_header(layout.header)
+        self._profile = self._parameters.profile(self.meta)
 
-        layout.expand_left(*self._parameters.left_column_x(self.meta))
-        layout.expand_right(*self._parameters.right_column_x(self.meta))
+        layout.expand_left(*self._profile.left_column_x)
+        layout.expand_right(*self._profile.right_column_x)
 
         for column in layout.ordered_columns():
             self._parse_column(column)
 
+    def process_page(self, interpreter, page):
+        """
+        Processes the `PDFPage` page with the interpreter or, if its analysis
+        is in the page cache, receives the analysis from the cache.
+        """
+        if self.page_cache is None:
+            return interpreter.process_page(page)
+
+        key = page_key(page, self._object_hashes)
+        # the analysis is stored in a tuple because it can be None.
+        entry = self.page_cache.get(key)
+        if entry is None:
+            self._page_key = key
+            try:
+                interpreter.process_page(page)
+            finally:
+                self._page_key = None
+        else:
+            self.pageno += 1
+            self.receive_page(entry[0])
+
+    def receive_layout(self, ltpage):
+        page = self.analyze_page(ltpage)
+        if self._page_key is not None:
+            self.page_cache.set(self._page_key, (page,))
+        self.receive_page(page)
+
+    def receive_page(self, page):
+        """
+        Receives the `PageAnalysis` of a page (None if it has no content).
+        """
+        if page is not None:
+            self.stitch_page(page)
+
     def _parse_column(self, column):
         for line in column:
             if isinstance(line, Table):
@@ -490,6 +738,11 @@ class LawConverter(PDFLayoutAnalyzer):
     def is_end_cite(line):
         return line[-1].get_text() == u'»'
 
+    def begin_page(self, page, ctm):
+        PDFLayoutAnalyzer.begin_page(self, page, ctm)
+        # the points painted on the page: equal points share the same object.
+        self._points = {}
+
     def _paint_network(self, path):
         network = LTNetwork()
 
@@ -500,7 +753,9 @@ class LawConverter(PDFLayoutAnalyzer):
                 element = (x, y)
                 element = apply_matrix_pt(self.ctm, element)
                 element = int_round(element[0]), int_round(element[1])
-                element = Point(element)
+                if element not in self._points:
+                    self._points[element] = Point(element)
+                element = self._points[element]
             elif len(tuple) == 1 and tuple[0] == 'h':
                 element = previous_element
                 state = 'l'
@@ -555,6 +810,81 @@ class LawConverter(PDFLayoutAnalyzer):
         self._paint_network(path)
 
 
+class LawPageAnalyzer(LawConverter):
+    """
+    A device that only analyses pages, storing their `PageAnalysis` in `pages`
+    so they can be stitched by a `LawConverter` later.
+    """
+    def __init__(self, rsrcmgr, pageno=1, laparams=None, page_cache=None):
+        LawConverter.__init__(self, rsrcmgr, pageno=pageno, laparams=laparams,
+                              page_cache=page_cache)
+        self.pages = []
+
+    def receive_page(self, page):
+        if page is not None:
+            self.pages.append(page)
+
+
+class LawHeaderReader(LawConverter):
+    """
+    A device that only reads the meta information of the document from the
+    header of its first content page, storing it in `header_meta`.
+
+    Only the text of the header is laid out, and only the lines and
+    rectangles that identify pages without content are kept: tables, images
+    and the text below the header are ignored.
+    """
+    def __init__(self, rsrcmgr, pageno=1, laparams=None):
+        LawConverter.__init__(self, rsrcmgr, pageno=pageno, laparams=laparams)
+        self.header_meta = None
+
+    def _paint_network(self, path):
+        pass
+
+    def render_image(self, name, stream):
+        pass
+
+    def render_char(self, matrix, font, fontsize, scaling, rise, cid):
+        (a, b, c, d, e, f) = matrix
+        # an upright char whose baseline is below the header: only its advance
+        # is needed (see `LTChar`).
+        if b == 0 and c == 0 and d > 0 and \
+                f + d*rise < HEADER_BASELINE_MIN_Y:
+            return font.char_width(cid) * fontsize * scaling
+        return LawConverter.render_char(self, matrix, font, fontsize, scaling,
+                                        rise, cid)
+
+    def receive_layout(self, ltpage):
+        if self.header_meta is not None:
+            return
+        if not len(ltpage) or not isinstance(ltpage[0], LTTextBox):
+            return
+        lines = ltpage[0]
+        items = ltpage[1:]
+
+        # the same pages as the ones ignored by `analyze_page`.
+        if self._is_summary_page(items):
+            return
+        header_min_y = lines[0].y0
+        if self._last_page_limit(items) > header_min_y:
+            return
+
+        # the same header as the one of `_build_layout`.
+        header = LTTextHeader()
+        for line in lines:
+            line._objs = line._objs[:-1]  # remove '\n' char from line.
+            if line.y0 > header_min_y - 5:
+                header.add(line)
+        header.analyze(None)
+
+        meta = Meta()
+        try:
+            meta.parse_header(header)
+        except (ValueError, KeyError, IndexError, NotImplementedError):
+            return  # not a content page (e.g. a cover or a summary)
+        self.header_meta = meta
+
+
 class LAOrganizer(LAParams):
 
     def __init__(self):
@@ -1,34 +1,53 @@
 import re
+from bisect import bisect_left, bisect_right
 from collections import defaultdict
 
 from pdfminer.layout import LTComponent, LTImage
 
-from pt_law_parser.auxiliar import eq, middle_x
+from pt_law_parser.auxiliar import eq, middle_x, GridIndex
+
+
+SPACED_HYPHEN = re.compile(ur' (\-\w+?)', flags=re.U)
 
 
 class Paragraph(object):
+    """
+    A paragraph of text. Merged lines are kept as fragments and only joined
+    when the text is read, so that merging is linear on the paragraph length.
+    """
 
     @staticmethod
     def sanitize(text):
         # hyphens in words are getting a space from PDFminer. Remove it.
-        return re.sub(ur' (\-\w+?)', ur'\1', text, flags=re.U)
+        return SPACED_HYPHEN.sub(ur'\1', text)
 
     def __init__(self, text):
         assert(text[-1] != '\n')
-        self._text = self.sanitize(text.strip())
+        self._fragments = [self.sanitize(text.strip())]
+
+    def _last_character(self):
+        for fragment in reversed(self._fragments):
+            if fragment:
+                return fragment[-1]
+        return ''
 
     def merge(self, other_line):
         text = other_line.text
-        if self.text[-1] == '-':
-            self._text = self._text[:-1]
+        last_character = self._last_character()
+        if last_character == '-':
+            while not self._fragments[-1]:
+                self._fragments.pop()
+            self._fragments[-1] = self._fragments[-1][:-1]
         # don't merge two lines without a space in between if no hyphen
-        elif text[0] != ' ' and self._text[-1] != ' ':
+        elif text[0] != ' ' and last_character != ' ':
             text = ' ' + text
-        self._text += self.sanitize(text)
+        self._fragments.append(self.sanitize(text))
 
     @property
     def text(self):
-        return self._text
+        if len(self._fragments) > 1:
+            self._fragments = [''.join(self._fragments)]
+        return self._fragments[0]
 
     def as_html(self):
         return '<p>%s</p>' % self.text
@@ -40,6 +59,69 @@ class Header(Paragraph):
         return '<h1>%s</h1>' % self.text
 
 
+class TableElement(object):
+    """
+    Represents an element of an HTML table. It has a colspan and rowspan.
+    """
+    def __init__(self, cell):
+        self.cell = cell
+        self.row = None
+        self.column = None
+        self.colspan = 0
+        self.rowspan = 0
+
+        self._lines = []
+        self._min_x = 0
+        self._min_y = 0
+
+    @property
+    def lines(self):
+        return self._lines
+
+    def add(self, row, column):
+        if self.row is None:
+            self.row = row
+            self.column = column
+        else:
+            if self.row == row:
+                self.colspan += 1
+            if self.column == column:
+                self.rowspan += 1
+
+    def add_line(self, item, bbox):
+        """
+        Adds a line to the cell assuming a bounding box bbox.
+        """
+        # todo: this code is similar to _parse_line. Common implementation?
+        def remove_dots(text):
+            return text.replace(' .', '')
+
+        text = remove_dots(item.get_text())
+        if text == '.':
+            return
+        line = Paragraph(text)
+
+        if not self._lines:
+            # cell is empty
+            self._lines.append(line)
+            self._min_x = item.x0
+        else:
+            middle_x_cell = middle_x(bbox)
+            middle_x_line = middle_x(item.bbox)
+            is_centered = eq(middle_x_cell, middle_x_line, 1)
+
+            if is_centered:
+                if self._min_y - item.y1 < 0:
+                    self._lines[-1].merge(line)
+                else:
+                    self._lines.append(line)
+            elif eq(self._min_x, item.x0, 1):
+                self._lines.append(line)
+            else:
+                self._lines[-1].merge(line)
+        self._min_y = item.y0
+
+
 class Table(LTComponent):
     """
     A table has the following interface:
@@ -49,67 +131,7 @@ class Table(LTComponent):
     3. represents itself in HTML (as_html)
     """
 
-    class Element():
-        """
-        Represents an element of an HTML table. It has a colspan and rowspan.
-        """
-        def __init__(self, cell):
-            self.cell = cell
-            self.row = None
-            self.column = None
-            self.colspan = 0
-            self.rowspan = 0
-
-            self._lines = []
-            self._min_x = 0
-            self._min_y = 0
-
-        @property
-        def lines(self):
-            return self._lines
-
-        def add(self, row, column):
-            if self.row is None:
-                self.row = row
-                self.column = column
-            else:
-                if self.row == row:
-                    self.colspan += 1
-                if self.column == column:
-                    self.rowspan += 1
-
-        def add_line(self, item, bbox):
-            """
-            Adds a line to the cell assuming a bounding box bbox.
-            """
-            # todo: this code is similar to _parse_line. Common implementation?
-            def remove_dots(text):
-                return text.replace(' .', '')
-
-            text = remove_dots(item.get_text())
-            if text == '.':
-                return
-            line = Paragraph(text)
-
-            if not self._lines:
-                # cell is empty
-                self._lines.append(line)
-                self._min_x = item.x0
-            else:
-                middle_x_cell = middle_x(bbox)
-                middle_x_line = middle_x(item.bbox)
-                is_centered = eq(middle_x_cell, middle_x_line, 1)
-
-                if is_centered:
-                    if self._min_y - item.y1 < 0:
-                        self._lines[-1].merge(line)
-                    else:
-                        self._lines.append(line)
-                elif eq(self._min_x, item.x0, 1):
-                    self._lines.append(line)
-                else:
-                    self._lines[-1].merge(line)
-            self._min_y = item.y0
+    Element = TableElement
 
     class EmptyTableError(Exception):
         """
@@ -136,80 +158,68 @@ class Table(LTComponent):
 
         self._cells = self._create_cells(network)
         self._elements = self._build_elements(self._cells)
+        self._rows_elements = self._elements_by_row(self._elements)
+        self._index = GridIndex((element.cell.bbox
+                                 for element in self._elements),
+                                self._columns_borders, self._rows_borders)
 
     @staticmethod
     def _create_cells(network):
         """
         Creates cells from the network and returns then
         as LTComponents.
-        """
-        squares_taken = defaultdict(set)
-        cells = set()
 
-        def city_distance(point, point_prime):
-            return abs(point.x - point_prime.x) + abs(point.y - point_prime.y)
+        The cells are the faces of the network: each link is walked once in
+        each direction, always turning as much to the left as possible, which
+        walks around each face counter-clockwise and around the outside of the
+        network clockwise.
 
-        def is_perpendicular(v1_x, v1_y, v2_x, v2_y):
-            return v1_x*v2_x + v1_y*v2_y == 0
+        A line that ends inside a face does not split it: the face is one cell.
+        A face that is not a rectangle becomes a cell with its bounding box,
+        which can overlap the neighbouring cells.
+        """
+        # the closest linked point of each point in each direction. Collinear
+        # points are all linked, so the closest one is the next on the line.
+        neighbours = defaultdict(dict)
+        for point in network:
+            for link in network.links[point]:
+                direction = (cmp(link.x, point.x), cmp(link.y, point.y))
+                closest = neighbours[point].get(direction)
+                if closest is None or \
+                        abs(link.x - point.x) + abs(link.y - point.y) < \
+                        abs(closest.x - point.x) + abs(closest.y - point.y):
+                    neighbours[point][direction] = link
 
+        cells = set()
+        walked = set()
         for point in sorted(network, key=lambda p: (p.x, p.y)):
-            for l1 in sorted(network.links[point],
-                             key=lambda p: city_distance(p, point)):
-                valid_links = [
-                    link for link in network.links[point] if link != l1 and
-                    is_perpendicular(link.x - point.x, link.y - point.y,
-                                     l1.x - point.x, l1.y - point.y)]
-
-                for l2 in sorted(valid_links,
-                                 key=lambda p: city_distance(p, point)):
-                    inter = network.links[l2].intersection(network.links[l1])
-                    intersection = list(inter)
-
-                    # remove initial point
-                    intersection.remove(point)
-
-                    if len(intersection) == 0:
-                        continue
-
-                    # sort by areas: smallest area first
-                    area = lambda p: (p.x - point.x)*(p.y - point.y)
-                    intersection.sort(key=area)
-
-                    # square is formed by [point, l1, l2, last_point], in this
-                    # order.
-                    points = [point, l1, l2, intersection[0]]
-
-                    # compute middle position of the square
-                    middle_x = sum(point.x for point in points)/4.
-                    middle_y = sum(point.y for point in points)/4.
-
-                    # check if any point already has one of its squares
-                    # (at most 4) used.
-                    is_taken = False
-                    square = range(4)
-                    for i in range(4):
-                        # compute the position of the point in relation to the
-                        # middle corresponding to one of the following squares
-                        # position: [(1,1), (-1,1), (1,-1), (-1,-1)]
-                        vx = middle_x - points[i].x
-                        vy = middle_y - points[i].y
-
-                        square[i] = (int(vx/abs(vx)), int(vy/abs(vy)))
-
-                        belongs = square[i] in squares_taken[points[i]]
-
-                        is_taken = is_taken or belongs
-
-                    if not is_taken:
-
-                        cell = LTComponent((point.x, point.y,
-                                            intersection[0].x, intersection[0].y))
-
-                        cells.add(cell)
-
-                        for i in range(4):
-                            squares_taken[points[i]].add(square[i])
-                        break
+            for direction in neighbours[point]:
+                if (point, direction) in walked:
+                    continue
+
+                face = []
+                area = 0
+                current, heading = point, direction
+                while (current, heading) not in walked:
+                    walked.add((current, heading))
+                    face.append(current)
+
+                    next_point = neighbours[current][heading]
+                    area += current.x*next_point.y - next_point.x*current.y
+
+                    # left, straight, right and back (which always exists).
+                    dx, dy = heading
+                    for heading in ((-dy, dx), (dx, dy), (dy, -dx), (-dx, -dy)):
+                        if heading in neighbours[next_point]:
+                            break
+                    current = next_point
+
+                # only faces walked counter-clockwise are cells.
+                if area > 0:
+                    cells.add(LTComponent((min(p.x for p in face),
+                                           min(p.y for p in face),
+                                           max(p.x for p in face),
+                                           max(p.y for p in face))))
 
         return cells
 
@@ -217,19 +227,46 @@ class Table(LTComponent):
         """
         Converts the cells into elements.
         """
+        def slots(borders, start, end):
+            # the borders b in borders[:-1] with start < b + 0.1 < end, found
+            # by bisection on a slightly larger range.
+            first = bisect_left(borders, start - 1)
+            last = bisect_right(borders, end, hi=len(borders) - 1)
+            return [border for border in borders[first:last]
+                    if start < border + 0.1 < end]
+
         elements = []
         for cell in cells:
-            elements.append(self.Element(cell))
-
-        for row in reversed(self._rows_borders[:-1]):
-            for column in self._columns_borders[:-1]:
-                for cell_index, cell in enumerate(cells):
-                    if cell.y0 < row + 0.1 < cell.y1 and\
-                       cell.x0 < column + 0.1 < cell.x1:
-                        elements[cell_index].add(row, column)
+            element = self.Element(cell)
+            elements.append(element)
+
+            rows = slots(self._rows_borders, cell.y0, cell.y1)
+            columns = slots(self._columns_borders, cell.x0, cell.x1)
+            if not rows or not columns:
+                continue
+
+            # the top left slot of the cell, followed by the remaining slots
+            # of its top row and of its left column.
+            element.add(rows[-1], columns[0])
+            for column in columns[1:]:
+                element.add(rows[-1], column)
+            for row in rows[:-1]:
+                element.add(row, columns[0])
 
         return sorted(elements, key=lambda e: (e.cell.x0, e.cell.y0))
 
+    @staticmethod
+    def _elements_by_row(elements):
+        """
+        Returns a map from each row to its elements, sorted by column.
+        """
+        rows = defaultdict(list)
+        for element in sorted((element for element in elements
+                               if element.row is not None),
+                              key=lambda e: e.column):
+            rows[element.row].append(element)
+        return rows
+
     @property
     def cells(self):
         return self._cells
@@ -238,47 +275,51 @@ class Table(LTComponent):
         """
         Adds a text item to the table, inserting it into the correct cell.
         """
-        for element in self._elements:
+        # the first overlapping element (in the order of `_elements`) is used.
+        for position in self._index.candidates(item.bbox):
+            element = self._elements[position]
             if element.cell.is_hoverlap(item) and element.cell.is_voverlap(item):
                 element.add_line(item, element.cell.bbox)
                 break
 
-    def as_html(self):
-
-        string = ''
+    def iter_html(self):
+        """
+        Yields the HTML of the table in chunks, one per cell.
+        """
+        yield '<table>\n'
         for row in reversed(self._rows_borders[:-1]):
-            string += '<tr>\n'
-            for column in self._columns_borders[:-1]:
-                for element in self._elements:
-                    if element.column == column and element.row == row:
+            yield '<tr>\n'
+            for element in self._rows_elements.get(row, ()):
+                lines = element.lines
+                colspan = element.colspan
+                rowspan = element.rowspan
 
-                        lines = element.lines
-                        colspan = element.colspan
-                        rowspan = element.rowspan
+                text = '\n'.join(line.as_html() for line in lines)
 
-                        text = '\n'.join(line.as_html() for line in lines)
+                if colspan:
+                    colspan = 'colspan="%d"' % (colspan + 1)
+                else:
+                    colspan = ''
 
-                        if colspan:
-                            colspan = 'colspan="%d"' % (colspan + 1)
-                        else:
-                            colspan = ''
+                if rowspan:
+                    rowspan = 'rowspan="%d"' % (rowspan + 1)
+                else:
+                    rowspan = ''
 
-                        if rowspan:
-                            rowspan = 'rowspan="%d"' % (rowspan + 1)
-                        else:
-                            rowspan = ''
+                attributes = ''
+                if rowspan or colspan:
+                    attributes = ' '
+                if rowspan and colspan:
+                    attributes += rowspan + ' ' + colspan
+                else:
+                    attributes += rowspan + colspan
 
-                        attributes = ''
-                        if rowspan or colspan:
-                            attributes = ' '
-                        if rowspan and colspan:
-                            attributes += rowspan + ' ' + colspan
-                        else:
-                            attributes += rowspan + colspan
+                yield '<td%s>%s</td>\n' % (attributes, text)
+            yield '</tr>\n'
+        yield '</table>'
 
-                        string += '<td%s>%s</td>\n' % (attributes, text)
-            string += '</tr>\n'
-        return '<table>\n%s</table>' % string
+    def as_html(self):
+        return ''.join(self.iter_html())
 
 
 class BlockquoteStart(object):
@@ -301,5 +342,11 @@ class SimpleImage(LTImage):
         self._name = ltimage.name
         self._stream = ltimage.stream
 
+    def __getstate__(self):
+        # the stream is bound to the open document: it is not pickled.
+        state = self.__dict__.copy()
+        state['_stream'] = None
+        return state
+
     def as_html(self):
         return '<p>(Ver imagem no documento original.)</p>'
@@ -1,12 +1,17 @@
+from bisect import bisect_left, bisect_right, insort
 from collections import defaultdict
-from math import ceil
+from math import ceil, floor
 
 from pdfminer.layout import LTExpandableContainer, LTItem
 
+from pt_law_parser import validation
 from pt_law_parser.point import Point
 from pt_law_parser.network import UndirectedNetwork
 
 
+INFINITY = float('inf')
+
+
 class LTTextColumn(LTExpandableContainer):
 
     def analyze(self, laparams):
@@ -31,6 +36,55 @@ class LTTextHeader(LTExpandableContainer):
                             reverse=True)
 
 
+class SortedColumns(object):
+    """
+    Columns sorted from top to bottom, i.e. by decreasing y0 and, for equal y0,
+    by order of insertion. Columns grow as items are added to them, so they are
+    repositioned with `update`.
+    """
+    def __init__(self):
+        self._columns = []
+        self._keys = []
+        self._key_of = {}
+
+    def __len__(self):
+        return len(self._columns)
+
+    def __getitem__(self, index):
+        return self._columns[index]
+
+    def __iter__(self):
+        return iter(self._columns)
+
+    def __contains__(self, column):
+        return id(column) in self._key_of
+
+    def _insert(self, column, key):
+        index = bisect_left(self._keys, key)
+        self._keys.insert(index, key)
+        self._columns.insert(index, column)
+        self._key_of[id(column)] = key
+
+    def add(self, column):
+        self._insert(column, (-column.y0, len(self._key_of)))
+
+    def update(self, column):
+        """
+        Repositions the column after its y0 changed.
+        """
+        key = self._key_of[id(column)]
+        index = bisect_left(self._keys, key)
+        del self._keys[index]
+        del self._columns[index]
+        self._insert(column, (-column.y0, key[1]))
+
+    def index_below(self, y):
+        """
+        Returns the index of the first column with y0 <= y.
+        """
+        return bisect_left(self._keys, (-y, -1))
+
+
 class LTPageLayout(object):
 
     MIDDLE_X1 = (292 + 306.0)/2
@@ -41,16 +95,33 @@ class LTPageLayout(object):
         self.left = []
         self.right = []
 
+        # the same columns, sorted from top to bottom.
+        self._center_sorted = SortedColumns()
+        self._left_sorted = SortedColumns()
+        self._right_sorted = SortedColumns()
+
         self._previous_column = None
 
+    @staticmethod
+    def _new_column(columns, sorted_columns):
+        column = LTTextColumn()
+        columns.append(column)
+        sorted_columns.add(column)
+        return column
+
+    def _add_to_column(self, column, item):
+        column.add(item)
+        for sorted_columns in (self._center_sorted, self._left_sorted,
+                               self._right_sorted):
+            if column in sorted_columns:
+                sorted_columns.update(column)
+
     def get_center_column(self, item):
-        columns = sorted(self.center, key=lambda c: c.y0, reverse=True)
-        left_columns = sorted(self.left, key=lambda c: c.y0, reverse=True)
+        columns = self._center_sorted
+        left_columns = self._left_sorted
 
         def new_column():
-            c = LTTextColumn()
-            self.center.append(c)
-            return c
+            return self._new_column(self.center, self._center_sorted)
 
         if not columns:
             return new_column()
@@ -70,10 +141,11 @@ class LTPageLayout(object):
 
         # below means that item is in the middle of columns.
 
-        for column in columns:
+        # columns above the item cannot overlap it.
+        for index in xrange(columns.index_below(item.y1), len(columns)):
             # if overlapped with a column, return that one
-            if item.voverlap(column):
-                return column
+            if item.voverlap(columns[index]):
+                return columns[index]
 
         for column in columns:
             # if not, get the first one, extending it to below
@@ -85,16 +157,17 @@ class LTPageLayout(object):
     def add(self, item):
         if item.x0 < item.x1 < self.MIDDLE_X1:
             if not self.left:
-                self.left.append(LTTextColumn())
+                self._new_column(self.left, self._left_sorted)
             column = self.left[-1]
         elif self.MIDDLE_X1 < item.x0 < item.x1:
             if not self.right:
-                self.right.append(LTTextColumn())
+                self._new_column(self.right, self._right_sorted)
             column = self.right[-1]
         else:
             column = self.get_center_column(item)
-        column.add(item)
-        self.assert_non_overlapping()
+        self._add_to_column(column, item)
+        if validation.is_enabled(validation.PARANOID):
+            self.assert_non_overlapping()
 
     def add_line(self, line, is_title):
         if line.x0 < line.x1 < self.MIDDLE_X1:
@@ -102,26 +175,28 @@ class LTPageLayout(object):
 
             column = None
             # if previous column is centered column
-            if self._previous_column and self._previous_column in self.center:
+            if self._previous_column and \
+                    self._previous_column in self._center_sorted:
                 if not is_title(line, LTTextColumn()):
                     column = self.center[-1]
 
             # standard left column
             if column is None:
                 if not self.left:
-                    self.left.append(LTTextColumn())
+                    self._new_column(self.left, self._left_sorted)
                 column = self.left[-1]
 
         elif self.MIDDLE_X1 < line.x0 < line.x1:
             if not self.right:
-                self.right.append(LTTextColumn())
+                self._new_column(self.right, self._right_sorted)
             column = self.right[-1]
         else:
             column = self.get_center_column(line)
 
-        column.add(line)
+        self._add_to_column(column, line)
         self._previous_column = column
-        self.assert_non_overlapping()
+        if validation.is_enabled(validation.PARANOID):
+            self.assert_non_overlapping()
 
     def add_header(self, line):
         self.header.add(line)
@@ -160,8 +235,8 @@ class LTPageLayout(object):
         if self.is_empty():
             return []
 
-        left = sorted(self.left, key=lambda c: c.y0, reverse=True)
-        right = sorted(self.right, key=lambda c: c.y0, reverse=True)
+        left = self._left_sorted
+        right = self._right_sorted
 
         class LTAlignedColumns:
             """
@@ -179,7 +254,9 @@ class LTPageLayout(object):
         right_columns_paired = []
         for l_column in left:
             was_found = False
-            for r_column in right:
+            # right columns above the left column cannot overlap it.
+            for index in xrange(right.index_below(l_column.y1), len(right)):
+                r_column = right[index]
                 if l_column.voverlap(r_column):
                     aligned_columns.append(LTAlignedColumns(l_column, r_column))
                     was_found = True
@@ -191,8 +268,9 @@ class LTPageLayout(object):
         # right columns must always be paired
         assert(len(right_columns_paired) == len(right))
 
-        # sort centered and aligned columns.
-        columns = sorted(self.center + aligned_columns,
+        # sort centered and aligned columns; both are already sorted, which
+        # the sort takes advantage of.
+        columns = sorted(list(self._center_sorted) + aligned_columns,
                          key=lambda c: c.y0, reverse=True)
 
         # recover the aligned columns
@@ -226,28 +304,49 @@ class LTNetwork(LTItem, UndirectedNetwork):
 
         self.remove_point(old_node)
 
+    def _near_pairs(self, distance):
+        """
+        Returns the pairs (point, point_prime) of points at most `distance`
+        apart in x and in y, where point comes first in the iteration order.
+
+        Points are bucketed in a grid of cells of side `distance`, so that each
+        point is only compared with the points of the neighbouring cells.
+        """
+        def cell(value):
+            return int(floor(value/float(distance)))
+
+        pairs = []
+        buckets = defaultdict(list)
+        for point in self:
+            cell_x = cell(point.x)
+            cell_y = cell(point.y)
+            for dx in (-1, 0, 1):
+                for dy in (-1, 0, 1):
+                    for point_prime in buckets.get((cell_x + dx, cell_y + dy),
+                                                   ()):
+                        if abs(point_prime.x - point.x) <= distance and \
+                                abs(point_prime.y - point.y) <= distance:
+                            pairs.append((point_prime, point))
+            buckets[(cell_x, cell_y)].append(point)
+
+        return pairs
+
     def _remove_duplicates(self):
         """
         Removes duplicated points close to each other.
         """
         # select points to remove by proximity
-        points_to_remove = set()
-        for point in self:
-            for point_prime in self:
-                if point != point_prime and\
-                        abs(point_prime.x - point.x) <= 2 and\
-                        abs(point_prime.y - point.y) <= 2 and\
-                        (point_prime, point) not in points_to_remove:
-                    points_to_remove.add((point, point_prime))
+        points_to_remove = self._near_pairs(2)
 
         removed_points = set()
         for point, point_prime in points_to_remove:
-            if point in removed_points:
+            if point in removed_points or point_prime in removed_points:
                 continue
 
             for link_prime in self.links[point_prime]:
-                self.links[point].add(link_prime)
-                self.links[link_prime].add(point)
+                # a link between both points would become a self-link.
+                if link_prime != point:
+                    self._add_link(point, link_prime)
 
             # track removed points
             removed_points.add(point_prime)
@@ -265,37 +364,8 @@ class LTNetwork(LTItem, UndirectedNetwork):
             raw_y_values[point.y] += 1
 
         # stores which values to replace (remove close values)
-        replace_x = {}
-        for x in raw_x_values:
-            for x_prime in raw_x_values:
-                if x != x_prime and abs(x - x_prime) < 5:
-                    if raw_x_values[x_prime] > raw_x_values[x]:
-                        replace_x[x] = x_prime
-                    elif raw_x_values[x_prime] == raw_x_values[x]:
-                        # in case they are the same, we must ensure
-                        # we don't substitute both by each other.
-                        if x > x_prime:
-                            replace_x[x] = x_prime
-                        else:
-                            replace_x[x_prime] = x
-                    else:
-                        replace_x[x_prime] = x
-
-        replace_y = {}
-        for y in raw_y_values:
-            for y_prime in raw_y_values:
-                if y != y_prime and abs(y - y_prime) < 5:
-                    if raw_y_values[y_prime] > raw_y_values[y]:
-                        replace_y[y] = y_prime
-                    elif raw_y_values[y_prime] == raw_y_values[y]:
-                        # in case they are the same, we must ensure
-                        # we don't substitute both by each other.
-                        if y > y_prime:
-                            replace_y[y] = y_prime
-                        else:
-                            replace_y[y_prime] = y
-                    else:
-                        replace_y[y_prime] = y
+        replace_x = snap_values(raw_x_values, 5)
+        replace_y = snap_values(raw_y_values, 5)
 
         for point in list(self)[:]:
             if point.x in replace_x:
@@ -316,8 +386,7 @@ class LTNetwork(LTItem, UndirectedNetwork):
                 assert(point1.x == point.x == point2.x or
                        point1.y == point.y == point2.y)
 
-                self.links[point1].add(point2)
-                self.links[point2].add(point1)
+                self._add_link(point1, point2)
 
                 self.remove_point(point)
 
@@ -327,44 +396,31 @@ class LTNetwork(LTItem, UndirectedNetwork):
         """
         networks = []
 
-        def add_point(network, point):
-            """
-            Recursively adds a point and respective connected component to
-            network.
-            """
-            network.add_point(point)
-            for link in self.links[point]:
-                if link not in network:
-                    add_point(network, link)
-                network.add_link(point, link)
-
+        visited = set()
         for point in self.points:
-            # try to find the network of this point.
-            found = None
-            for network in networks:
-                if point in network:
-                    found = network
-                    break
-
-            # if no network exists, create one for it.
-            if found is None:
-                networks.append(LTNetwork())
-                found = networks[-1]
-
-            # finally, add its connected component to the network.
-            add_point(found, point)
+            if point in visited:
+                continue
 
-            # asserts that the connected component is on that network only.
-            for link in self.links[point]:
-                assert(link in found)
-                for network in networks:
-                    if network != found:
-                        assert(point not in network)
-                        assert(link not in network)
+            # the connected component of the point, by breadth-first search.
+            component = [point]
+            visited.add(point)
+            index = 0
+            while index < len(component):
+                for link in self.links[component[index]]:
+                    if link not in visited:
+                        visited.add(link)
+                        component.append(link)
+                index += 1
+
+            network = self.subnetwork(component)
+            if validation.is_enabled(validation.PARANOID):
+                network.assert_consistency()
+            networks.append(network)
 
         # asserts that we didn't lost any point
-        assert(sum(len(network) for network in networks) ==
-               len(self))
+        if validation.is_enabled(validation.CHEAP):
+            assert(sum(len(network) for network in networks) ==
+                   len(self))
 
         for network in networks:
             network.close_network()
@@ -372,6 +428,22 @@ class LTNetwork(LTItem, UndirectedNetwork):
 
         return networks
 
+    def _lines(self):
+        """
+        Returns two maps: from each y to the points of that row sorted by x, and
+        from each x to the points of that column sorted by y.
+        """
+        rows = defaultdict(list)
+        columns = defaultdict(list)
+        for point in self:
+            rows[point.y].append(point)
+            columns[point.x].append(point)
+        for points in rows.values():
+            points.sort(key=lambda p: p.x)
+        for points in columns.values():
+            points.sort(key=lambda p: p.y)
+        return rows, columns
+
     def close_network(self):
         """
         Adds possible missing corners and border links to close the network.
@@ -388,10 +460,11 @@ class LTNetwork(LTItem, UndirectedNetwork):
         for corner in ((x0, y0), (x0, y1), (x1, y1), (x1, y0)):
             self.add_point(Point(corner))
 
+        rows, columns = self._lines()
+
         # add possible missing bottom and top borders
         for row in (rows_borders[0], rows_borders[-1]):
-            points = sorted([point for point in self if point.y == row],
-                            key=lambda p: p.x)
+            points = rows[row]
             for i, point in enumerate(points):
                 if i == 0:
                     continue
@@ -399,8 +472,7 @@ class LTNetwork(LTItem, UndirectedNetwork):
 
         # add possible missing left and right borders
         for column in (columns_borders[0], columns_borders[-1]):
-            points = sorted([point for point in self if point.x == column],
-                            key=lambda p: p.y)
+            points = columns[column]
             for i, point in enumerate(points):
                 if i == 0:
                     continue
@@ -411,16 +483,12 @@ class LTNetwork(LTItem, UndirectedNetwork):
         Adds links between all points that are collinear. These collinear points
         become fully connected.
         """
-        rows_borders = sorted(list(set(point.y for point in self)))
-        columns_borders = sorted(list(set(point.x for point in self)))
+        rows, columns = self._lines()
 
         links_to_create = set()
 
-        for row in rows_borders:
-            # all points in this row and sorted by x
-            points = sorted([point for point in self if point.y == row],
-                            key=lambda p: p.x)
-
+        # each line is sorted along its direction.
+        for points in rows.values() + columns.values():
             # a O(N^2) loop that breaks the inner
             # if there is a link-break along the way.
             for index, point in enumerate(points[:-1]):
@@ -436,18 +504,6 @@ class LTNetwork(LTItem, UndirectedNetwork):
 
                     index_prime += 1
 
-        # Exactly the same loop, but with x<>y and row<>column.
-        for column in columns_borders:
-            points = sorted([point for point in self
-                             if point.x == column], key=lambda p: p.y)
-            for index, point in enumerate(points[:-1]):
-                index_prime = index + 1
-                while index_prime != len(points) and \
-                        points[index_prime] in self.links[points[index_prime - 1]]:
-                    links_to_create.add((point, points[index_prime]))
-
-                    index_prime += 1
-
         # finally, add the links
         for point, point_prime in links_to_create:
             self.add_link(point, point_prime)
@@ -461,8 +517,10 @@ class LTNetwork(LTItem, UndirectedNetwork):
 
         self._remove_siblings()
 
-        self.assert_strait_links()
-        self.assert_no_intersections()
+        if validation.is_enabled(validation.CHEAP):
+            self.assert_strait_links()
+        if validation.is_enabled(validation.PARANOID):
+            self.assert_no_intersections()
 
         return self._get_components()
 
@@ -491,12 +549,10 @@ class LTNetwork(LTItem, UndirectedNetwork):
 
         v_links_to_subdivide = defaultdict(set)
         h_links_to_subdivide = defaultdict(set)
-        for link in vertical_links:
-            for link_prime in horizontal_links:
-                if intersect(link[0], link[1], link_prime[0], link_prime[1]):
-                    point = Point((link[0].x, link_prime[0].y))
-                    v_links_to_subdivide[link].add(point)
-                    h_links_to_subdivide[link_prime].add(point)
+        for link, link_prime in crossings(vertical_links, horizontal_links):
+            point = Point((link[0].x, link_prime[0].y))
+            v_links_to_subdivide[link].add(point)
+            h_links_to_subdivide[link_prime].add(point)
 
         for link in h_links_to_subdivide:
             points = sorted(h_links_to_subdivide[link], key=lambda p: p.x)
@@ -517,27 +573,35 @@ class LTNetwork(LTItem, UndirectedNetwork):
         vertical_links = [link for link in links if link[0].x == link[1].x]
         horizontal_links = [link for link in links if link[0].y == link[1].y]
 
+        # subdividing does not add points, so the lines are computed once.
+        rows, columns = self._lines()
+
+        rows_xs = dict((y, [p.x for p in points])
+                       for y, points in rows.items())
+        columns_ys = dict((x, [p.y for p in points])
+                          for x, points in columns.items())
+
         found_points = dict()
         for link in horizontal_links:
-            points = [p for p in self if p.y == link[0].y and
-                      link[0].x < p.x < link[1].x]
+            xs = rows_xs[link[0].y]
+            points = rows[link[0].y][bisect_right(xs, link[0].x):
+                                     bisect_left(xs, link[1].x)]
             if points:
                 found_points[link] = points
 
         for link in found_points:
-            points = sorted(found_points[link], key=lambda p: p.x)
-            self._subdivide(link[0], link[1], points)
+            self._subdivide(link[0], link[1], found_points[link])
 
         found_points = dict()
         for link in vertical_links:
-            points = [p for p in self if p.x == link[0].x and
-                                  link[0].y < p.y < link[1].y]
+            ys = columns_ys[link[0].x]
+            points = columns[link[0].x][bisect_right(ys, link[0].y):
+                                        bisect_left(ys, link[1].y)]
             if points:
                 found_points[link] = points
 
         for link in found_points:
-            points = sorted(found_points[link], key=lambda p: p.y)
-            self._subdivide(link[0], link[1], points)
+            self._subdivide(link[0], link[1], found_points[link])
 
         # asserts that we didn't added any new point
         assert(previous_number_of_points == len(self))
@@ -575,6 +639,129 @@ class LTNetwork(LTItem, UndirectedNetwork):
             self.add_link(point, point_after)
 
 
+class _MaxTree(object):
+    """
+    A segment tree of `size` values, all -1 at the start, that returns the
+    maximum of a range of them in O(log(size)).
+    """
+    def __init__(self, size):
+        self._size = size
+        self._tree = [-1]*(2*size)
+
+    def set(self, index, value):
+        index += self._size
+        self._tree[index] = value
+        while index > 1:
+            index //= 2
+            self._tree[index] = max(self._tree[2*index],
+                                    self._tree[2*index + 1])
+
+    def max(self, start, end):
+        """
+        Returns the maximum of the values [start, end).
+        """
+        result = -1
+        start += self._size
+        end += self._size
+        while start < end:
+            if start % 2:
+                result = max(result, self._tree[start])
+                start += 1
+            if end % 2:
+                end -= 1
+                result = max(result, self._tree[end])
+            start //= 2
+            end //= 2
+        return result
+
+
+def snap_values(histogram, distance):
+    """
+    Returns which values of the `histogram` (value -> count) are replaced and
+    by which values.
+
+    A value is replaced by a value closer than `distance` to it that is more
+    common than it (or as common and smaller). When there are several, it is
+    replaced by the one that comes last in the iteration order of `histogram`,
+    which is the choice of comparing every pair of values in that order.
+    Replacements are not followed: a value may be replaced by a value that is
+    itself replaced, so that no value moves by `distance` or more.
+
+    Values are visited from the most common to the least common, and the last
+    of the values already visited in the window of values closer than
+    `distance` is found with a segment tree over the sorted values, in
+    O(k log(k)).
+    """
+    order = list(histogram)
+    position = dict((value, i) for i, value in enumerate(order))
+    values = sorted(histogram)
+
+    # the window [starts[i], ends[i]) of values closer than `distance` to
+    # values[i].
+    starts = []
+    ends = []
+    start = end = 0
+    for value in values:
+        while value - values[start] >= distance:
+            start += 1
+        while end < len(values) and values[end] - value < distance:
+            end += 1
+        starts.append(start)
+        ends.append(end)
+
+    def key(index):
+        return -histogram[values[index]], values[index]
+
+    replace = {}
+    # the positions in `order` of the values visited, by their sorted index.
+    visited = _MaxTree(len(values))
+    for index in sorted(range(len(values)), key=key):
+        last = visited.max(starts[index], ends[index])
+        if last != -1:
+            replace[values[index]] = order[last]
+        visited.set(index, position[values[index]])
+
+    return replace
+
+
+def crossings(vertical_links, horizontal_links):
+    """
+    Returns the pairs (vertical link, horizontal link) that intersect (see
+    `intersect`), using a sweep line along x. The points of each link are
+    sorted by (x, y).
+
+    For axis-aligned links, `intersect` is true when the crossing is strictly
+    inside both links; the sweep keeps the y of the horizontal links strictly
+    crossed by the sweep line, sorted, and each vertical link queries the y's
+    strictly inside it. This is O((V + H) log(H) + K) instead of O(V*H).
+    """
+    # events at the same x: horizontal links end (0) before vertical links are
+    # queried (1), which is before horizontal links start (2).
+    events = []
+    for index, link in enumerate(horizontal_links):
+        events.append((link[0].x, 2, index))
+        events.append((link[1].x, 0, index))
+    for index, link in enumerate(vertical_links):
+        events.append((link[0].x, 1, index))
+    events.sort()
+
+    result = []
+    active = []  # sorted list of (y, index) of horizontal links
+    for _, kind, index in events:
+        if kind == 2:
+            insort(active, (horizontal_links[index][0].y, index))
+        elif kind == 0:
+            del active[bisect_left(active, (horizontal_links[index][0].y,
+                                            index))]
+        else:
+            link = vertical_links[index]
+            start = bisect_right(active, (link[0].y, INFINITY))
+            end = bisect_left(active, (link[1].y, -INFINITY))
+            for _, index_prime in active[start:end]:
+                result.append((link, horizontal_links[index_prime]))
+    return result
+
+
 def ccw(a, b, c):
     return (c.y - a.y) * (b.x - a.x) > (b.y - a.y) * (c.x - a.x)
 
@@ -134,3 +134,15 @@ class Meta(object):
     @property
     def year(self):
         return self._date.year
+
+    @property
+    def series(self):
+        return self._series
+
+    @property
+    def number(self):
+        return self._number
+
+    @property
+    def date(self):
+        return self._date
@@ -1,11 +1,19 @@
+from pt_law_parser import validation
+
+
 class UndirectedNetwork(object):
     """
     An undirected network has a list of points p_i and links p_i<->p_j.
     There are no self-links (i.e. p_i<->p_i is forbidden).
+
+    Points and links are stored in sets, not in arrays: the package does not
+    depend on NumPy. Operations in bulk (e.g. `update`) use set operations.
     """
     def __init__(self):
         self._points = set()
         self._links = dict()
+        # the links as pairs of points sorted by (x, y).
+        self._edges = set()
 
     @property
     def points(self):
@@ -21,6 +29,15 @@ class UndirectedNetwork(object):
     def links(self):
         return self._links
 
+    @staticmethod
+    def _edge(point, point_prime):
+        """
+        Returns the link point<->point_prime as a pair sorted by (x, y).
+        """
+        if (point.x, point.y) <= (point_prime.x, point_prime.y):
+            return point, point_prime
+        return point_prime, point
+
     def add_point(self, point):
         if point not in self._points:
             self._points.add(point)
@@ -32,6 +49,7 @@ class UndirectedNetwork(object):
         # remove links from other points
         for point_prime in self._links[point]:
             self._links[point_prime].remove(point)
+            self._edges.discard(self._edge(point, point_prime))
 
         # remove links
         del self._links[point]
@@ -43,10 +61,48 @@ class UndirectedNetwork(object):
         assert(point != point_prime)
         assert(point in self and point_prime in self)
 
+        self._add_link(point, point_prime)
+
+        if validation.is_enabled(validation.PARANOID):
+            self.assert_consistency()
+
+    def _add_link(self, point, point_prime):
+        """
+        Adds the link without checks.
+        """
         self._links[point].add(point_prime)
         self._links[point_prime].add(point)
-
-        self.assert_consistency()
+        self._edges.add(self._edge(point, point_prime))
+
+    def update(self, network):
+        """
+        Adds all points and links of `network` to this network, in bulk, with
+        set operations instead of adding each point and link.
+        """
+        for point, links in network.links.items():
+            if point in self._links:
+                self._links[point].update(links)
+            else:
+                self._links[point] = set(links)
+        self._points.update(network.points)
+        self._edges.update(network._edges)
+
+        if validation.is_enabled(validation.PARANOID):
+            self.assert_consistency()
+
+    def subnetwork(self, points):
+        """
+        Returns a new network with `points` and the links between them.
+        """
+        points = set(points)
+        network = self.__class__()
+        network._points = points
+        for point in points:
+            links = self._links[point] & points
+            network._links[point] = links
+            for link in links:
+                network._edges.add(self._edge(point, link))
+        return network
 
     def remove_link(self, point, point_prime):
         assert(point in self and point_prime in self)
@@ -55,15 +111,13 @@ class UndirectedNetwork(object):
 
         self._links[point].remove(point_prime)
         self._links[point_prime].remove(point)
+        self._edges.remove(self._edge(point, point_prime))
 
     def links_list(self):
-        links = []
-        for point in self.links:
-            for link in self.links[point]:
-                if (link, point) not in links and (point, link) not in links:
-                    points = sorted((point, link), key=lambda p: (p.x, p.y))
-                    links.append(tuple(points))
-        return links
+        """
+        Returns the list of links as pairs of points sorted by (x, y).
+        """
+        return list(self._edges)
 
     def print_links(self):
         print('{%s}' % ','.join('{%s,%s}' % ('{%s}' % point, '{%s}' % link)
@@ -77,3 +131,6 @@ class UndirectedNetwork(object):
             for link in self.links[point]:
                 if point not in self.links[link]:
                     assert(False)
+                assert(self._edge(point, link) in self._edges)
+        assert(len(self._edges) ==
+               sum(len(links) for links in self._links.values())/2)
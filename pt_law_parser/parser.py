@@ -1,20 +1,161 @@
+from multiprocessing import Pool
+
 from pdfminer.pdfinterp import PDFResourceManager, PDFPageInterpreter
 from pdfminer.pdfpage import PDFPage
 
-from pt_law_parser.converter import LAOrganizer, LawConverter
+from pt_law_parser.converter import LAOrganizer, LawConverter, \
+    LawPageAnalyzer, LawHeaderReader
+
+
+# number of chunks of pages per process; more chunks balance the load better
+# between processes at the cost of more documents opened.
+CHUNKS_PER_PROCESS = 4
 
 
-def parse_document(file_name):
+def _analyze_pages(arguments):
+    """
+    Returns the `PageAnalysis` of the pages `page_numbers` of the document and
+    the number of pages processed. This is the work of each process of
+    `parse_document`.
+    """
+    file_name, page_numbers, page_cache = arguments
 
     rsrcmgr = PDFResourceManager(caching=True)
 
     fp = file(file_name, 'rb')
 
-    device = LawConverter(rsrcmgr, laparams=LAOrganizer())
+    device = LawPageAnalyzer(rsrcmgr, laparams=LAOrganizer(),
+                             page_cache=page_cache)
+
+    interpreter = PDFPageInterpreter(rsrcmgr, device)
+    for page in PDFPage.get_pages(fp, pagenos=set(page_numbers)):
+        device.process_page(interpreter, page)
+    fp.close()
+
+    return device.pages, device.pageno - 1
+
+
+def _page_chunks(file_name, processes):
+    """
+    Splits the pages of the document into contiguous chunks of page numbers.
+    """
+    fp = file(file_name, 'rb')
+    pages_count = sum(1 for _ in PDFPage.get_pages(fp))
+    fp.close()
+
+    chunks_count = processes*CHUNKS_PER_PROCESS
+    size = max(1, -(-pages_count // chunks_count))  # ceil
+    return [range(start, min(start + size, pages_count))
+            for start in range(0, pages_count, size)]
+
+
+def parse_document(file_name, processes=1, cache=None, page_cache=None):
+    """
+    Parses the document and returns the device with the result.
+
+    With `processes` > 1, the pages are analysed in a pool of processes and
+    the result is stitched sequentially page by page, which gives the same
+    result as the sequential parsing.
+
+    With a `DocumentCache` `cache`, the result is taken from the cache when the
+    same document was already parsed, and stored in it otherwise. With a
+    `DocumentCache` `page_cache`, the same is done for each page.
+    """
+    if cache is None:
+        return _parse_document(file_name, processes, page_cache)
+
+    key = cache.key(file_name)
+    state = cache.get(key)
+    if state is not None:
+        device = LawConverter(PDFResourceManager(caching=True),
+                              laparams=LAOrganizer())
+        device.restore_result(state)
+        return device
+
+    device = _parse_document(file_name, processes, page_cache)
+    cache.set(key, device.result_state())
+    return device
+
+
+def _parse_document(file_name, processes, page_cache):
+    rsrcmgr = PDFResourceManager(caching=True)
+
+    device = LawConverter(rsrcmgr, laparams=LAOrganizer(),
+                          page_cache=page_cache)
+
+    if processes > 1:
+        pool = Pool(processes)
+        try:
+            chunks = [(file_name, page_numbers, page_cache) for page_numbers
+                      in _page_chunks(file_name, processes)]
+            # `imap` returns the chunks in order, so they can be stitched as
+            # soon as they arrive.
+            for pages, pages_count in pool.imap(_analyze_pages, chunks):
+                for page in pages:
+                    device.stitch_page(page)
+                # pages without content are not in `pages`, but are counted.
+                device.pageno += pages_count
+        finally:
+            pool.terminate()
+        return device
+
+    fp = file(file_name, 'rb')
 
     interpreter = PDFPageInterpreter(rsrcmgr, device)
     for page in PDFPage.get_pages(fp):
-        interpreter.process_page(page)
+        device.process_page(interpreter, page)
     fp.close()
 
     return device
+
+
+def iter_document(file_name, page_cache=None):
+    """
+    Parses the document page by page and yields the elements of the result
+    (e.g. `Paragraph`, `Header`, `Table`) as soon as they are final.
+    """
+    rsrcmgr = PDFResourceManager(caching=True)
+
+    fp = file(file_name, 'rb')
+
+    device = LawConverter(rsrcmgr, laparams=LAOrganizer(),
+                          page_cache=page_cache)
+
+    interpreter = PDFPageInterpreter(rsrcmgr, device)
+    try:
+        for page in PDFPage.get_pages(fp):
+            device.process_page(interpreter, page)
+            for element in device.pop_result():
+                yield element
+    finally:
+        fp.close()
+
+    for element in device.pop_result(final=True):
+        yield element
+
+
+def read_meta(file_name):
+    """
+    Returns the `Meta` of the document read from the header of its first
+    content page, or None if no header is found. Its `pages` only contains the
+    number of that page.
+
+    Only the header is laid out, which makes it much faster than parsing the
+    document.
+    """
+    rsrcmgr = PDFResourceManager(caching=True)
+
+    fp = file(file_name, 'rb')
+
+    device = LawHeaderReader(rsrcmgr, laparams=LAOrganizer())
+
+    interpreter = PDFPageInterpreter(rsrcmgr, device)
+    try:
+        for page in PDFPage.get_pages(fp):
+            interpreter.process_page(page)
+            if device.header_meta is not None:
+                break
+    finally:
+        fp.close()
+
+    return device.header_meta
@@ -1,33 +1,41 @@
 class Point(object):
     """
     A point with two coordinates that can be compared and used in sets.
+
+    Points are immutable and their hash is computed once, since they are hashed
+    in every operation of a network.
     """
+    __slots__ = ('x', 'y', '_hash')
+
     def __init__(self, point):
-        self._x = point[0]
-        self._y = point[1]
+        object.__setattr__(self, 'x', point[0])
+        object.__setattr__(self, 'y', point[1])
+        # the hash of the items of the attributes (('_x', x), ('_y', y)): the
+        # alignment of tables depends on the iteration order of sets of points,
+        # and so on this hash.
+        object.__setattr__(self, '_hash',
+                           hash((('_x', point[0]), ('_y', point[1]))))
 
-    def __hash__(self):
-        return hash(tuple(sorted(self.__dict__.items())))
+    def __setattr__(self, name, value):
+        raise AttributeError('Point is immutable')
 
-    @property
-    def x(self):
-        return self._x
+    def __reduce__(self):
+        return self.__class__, ((self.x, self.y),)
 
-    @property
-    def y(self):
-        return self._y
+    def __hash__(self):
+        return self._hash
 
     def __eq__(self, other):
-        return self.x == other.x and self.y == other.y
+        return self is other or (self.x == other.x and self.y == other.y)
 
     def __ne__(self, other):
         return not self == other
 
     def __iter__(self):
-        return iter([self._x, self._y])
+        return iter((self.x, self.y))
 
     def __str__(self):
-        return '%d,%d' % (self._x, self._y)
+        return '%d,%d' % (self.x, self.y)
 
     def __repr__(self):
         return '<%s (%s)>' % (self.__class__.__name__, str(self))
@@ -0,0 +1,51 @@
+"""
+Level of the self-checks (consistency assertions) run while parsing:
+
+* `OFF`: no self-checks;
+* `CHEAP`: self-checks that cost at most linear time per step (default);
+* `PARANOID`: all self-checks, including the ones run on every insertion
+  and the quadratic ones (used by the tests).
+
+The level can also be set with the environment variable
+PT_LAW_PARSER_VALIDATION (`off`, `cheap` or `paranoid`).
+"""
+import os
+
+
+OFF = 0
+CHEAP = 1
+PARANOID = 2
+
+_LEVELS = {'off': OFF, 'cheap': CHEAP, 'paranoid': PARANOID}
+
+
+
+def _parse_level(name):
+    """
+    Returns the level named `name` (e.g. in PT_LAW_PARSER_VALIDATION).
+    """
+    try:
+        return _LEVELS[name.lower()]
+    except KeyError:
+        raise ValueError('Invalid validation level %r: it must be one of %s' %
+                         (name, ', '.join(sorted(_LEVELS, key=_LEVELS.get))))
+
+
+_level = _parse_level(os.environ.get('PT_LAW_PARSER_VALIDATION', 'cheap'))
+
+
+def set_level(level):
+    global _level
+    assert(level in (OFF, CHEAP, PARANOID))
+    _level = level
+
+
+def get_level():
+    return _level
+
+
+def is_enabled(level):
+    """
+    Returns whether self-checks of `level` are run.
+    """
+    return _level >= level
@@ -1,8 +1,13 @@
 # encoding: utf-8
+import re
 from distutils.core import setup
 
+# read from the package without importing it, which requires pdfminer.
+with open('pt_law_parser/__init__.py') as f:
+    version = re.search(r"__version__ = '(.*)'", f.read()).group(1)
+
 setup(name='PT-Law-parser',
-      version='0.1',
+      version=version,
       description='Parser of the official PDF documents of the portuguese law.',
       long_description=open('README.md').read(),
       author='Jorge C. Leitão',
@@ -0,0 +1,10 @@
+from pt_law_parser import validation
+
+
+def setUpModule():
+    """
+    Runs all the self-checks of the parser in the tests of a module. Every test
+    module imports it as its own `setUpModule`, so that the level is set however
+    the tests are run (e.g. a single module with `discover tests -p`).
+    """
+    validation.set_level(validation.PARANOID)
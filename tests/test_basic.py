@@ -5,6 +5,8 @@ from pdfminer.pdfpage import PDFPage
 
 from pt_law_parser.converter import LAOrganizer, LawConverter
 
+from tests import setUpModule
+
 
 class TestDocument(unittest.TestCase):
 
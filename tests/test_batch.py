@@ -0,0 +1,69 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from pt_law_parser.batch import find_documents, convert_documents, \
+    output_file_name
+from pt_law_parser.parser import parse_document
+
+from tests import setUpModule
+
+
+class TestBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.output_dir)
+
+    def test_find_documents(self):
+        documents = find_documents(['tests/samples'])
+
+        self.assertTrue('tests/samples/137056.pdf' in documents)
+        self.assertFalse('tests/samples/107190.pdf.2.html' in documents)
+
+    def test_convert(self):
+        file_names = ['tests/samples/137056.pdf', 'tests/samples/131783.pdf']
+
+        report = convert_documents(file_names, self.output_dir, processes=2)
+
+        self.assertEqual(2, report.documents)
+        self.assertEqual([], report.failures)
+
+        for file_name in file_names:
+            with open(output_file_name(file_name, self.output_dir)) as f:
+                result = f.read().decode('utf-8')
+            self.assertEqual(parse_document(file_name).as_html(), result)
+
+    def test_failure(self):
+        file_name = os.path.join(self.output_dir, 'missing.pdf')
+
+        report = convert_documents([file_name], self.output_dir, processes=1)
+
+        self.assertEqual(0, report.documents)
+        self.assertEqual(file_name, report.failures[0][0])
+
+    def test_same_output(self):
+        """
+        Documents with the same name in different directories would have the
+        same HTML file in the output directory: the second one is a failure.
+        """
+        input_dir = tempfile.mkdtemp()
+        try:
+            file_names = []
+            for directory in ('a', 'b'):
+                os.mkdir(os.path.join(input_dir, directory))
+                file_name = os.path.join(input_dir, directory, '137056.pdf')
+                shutil.copy('tests/samples/137056.pdf', file_name)
+                file_names.append(file_name)
+
+            report = convert_documents(find_documents([input_dir]),
+                                       self.output_dir, processes=1)
+        finally:
+            shutil.rmtree(input_dir)
+
+        self.assertEqual(1, report.documents)
+        self.assertEqual([file_names[1]],
+                         [failure[0] for failure in report.failures])
@@ -0,0 +1,113 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from pt_law_parser.cache import DocumentCache
+from pt_law_parser.parser import parse_document
+
+from tests import setUpModule
+
+
+class TestDocumentCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_parse_document(self):
+        """
+        A document parsed from the cache has the same result as the document
+        parsed from the PDF.
+        """
+        file_name = 'tests/samples/133880.pdf'
+        cache = DocumentCache(self.directory)
+
+        device = parse_document(file_name, cache=cache)
+        self.assertTrue(cache.get(cache.key(file_name)) is not None)
+
+        cached_device = parse_document(file_name, cache=cache)
+
+        self.assertEqual(device.meta.pages, cached_device.meta.pages)
+        self.assertEqual(device.pageno, cached_device.pageno)
+        self.assertEqual(len(device.titles), len(cached_device.titles))
+        self.assertEqual(len(device.paragraphs), len(cached_device.paragraphs))
+        self.assertEqual(len(device.tables), len(cached_device.tables))
+        self.assertEqual(device.as_html(), cached_device.as_html())
+
+    def test_page_cache(self):
+        """
+        A document parsed with its pages from the cache has the same result as
+        the document parsed from the PDF.
+        """
+        self.assertSamePageCache('tests/samples/137056.pdf')
+
+    def test_page_cache_images(self):
+        """
+        Pages with JPEG images, which pdfminer cannot decode, are cached.
+        """
+        self.assertSamePageCache('tests/samples/128839.pdf')
+
+    def assertSamePageCache(self, file_name):
+        cache = DocumentCache(self.directory)
+
+        device = parse_document(file_name)
+        parse_document(file_name, page_cache=cache)
+        self.assertEqual(device.pageno - 1,
+                         len(os.listdir(self.directory)))
+
+        cached_device = parse_document(file_name, page_cache=cache)
+
+        self.assertEqual(device.meta.pages, cached_device.meta.pages)
+        self.assertEqual(device.pageno, cached_device.pageno)
+        self.assertEqual(device.as_html(), cached_device.as_html())
+
+    def test_eviction(self):
+        """
+        The least recently used entries are evicted first.
+        """
+        cache = DocumentCache(self.directory, max_size=2500)
+        value = 'x'*1000
+
+        cache.set('a', value)
+        cache.set('b', value)
+        os.utime(os.path.join(self.directory, 'a.pickle'),
+                 (time.time() - 10, time.time() - 10))
+        os.utime(os.path.join(self.directory, 'b.pickle'),
+                 (time.time() - 5, time.time() - 5))
+        # `a` is used, so `b` becomes the least recently used.
+        self.assertEqual(value, cache.get('a'))
+
+        cache.set('c', value)
+
+        self.assertEqual(value, cache.get('a'))
+        self.assertEqual(None, cache.get('b'))
+        self.assertEqual(value, cache.get('c'))
+
+    def test_stale_temporary_file(self):
+        """
+        Temporary files left by writers that died are removed, but not the
+        ones being written.
+        """
+        stale = os.path.join(self.directory, 'stale.tmp')
+        recent = os.path.join(self.directory, 'recent.tmp')
+        for path in (stale, recent):
+            with open(path, 'wb') as f:
+                f.write('x')
+        age = DocumentCache.TEMPORARY_MAX_AGE + 10
+        os.utime(stale, (time.time() - age, time.time() - age))
+
+        DocumentCache(self.directory).set('a', 'value')
+
+        self.assertFalse(os.path.exists(stale))
+        self.assertTrue(os.path.exists(recent))
+
+    def test_corrupted_entry(self):
+        cache = DocumentCache(self.directory)
+        with open(os.path.join(self.directory, 'a.pickle'), 'wb') as f:
+            f.write('not a pickle')
+
+        self.assertEqual(None, cache.get('a'))
@@ -1,3 +1,4 @@
+from tests import setUpModule
 from tests.test_basic import TestDocument
 
 
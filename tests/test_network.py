@@ -2,6 +2,9 @@ import unittest
 
 from pt_law_parser.network import UndirectedNetwork
 from pt_law_parser.point import Point
+from pt_law_parser import validation
+
+from tests import setUpModule
 
 
 class TestCase(unittest.TestCase):
@@ -29,3 +32,64 @@ class TestCase(unittest.TestCase):
         network.remove_link(Point((0, 1)), Point((1, 1)))
         self.assertEqual(3, len(network))
         self.assertEqual(1, len(network.links_list()))
+
+    def test_validation_level(self):
+        # the tests run all the self-checks (see `tests.setUpModule`).
+        self.assertEqual(validation.PARANOID, validation.get_level())
+
+        self.assertEqual(validation.OFF, validation._parse_level('Off'))
+        self.assertRaises(ValueError, validation._parse_level, 'all')
+
+    def test_consistency(self):
+        level = validation.get_level()
+        validation.set_level(validation.PARANOID)
+        try:
+            network = UndirectedNetwork()
+
+            network.add_point(Point((0, 0)))
+            network.add_point(Point((1, 0)))
+            network.add_link(Point((0, 0)), Point((1, 0)))
+
+            # an inconsistent link is detected by the paranoid validation.
+            network.links[Point((0, 0))].remove(Point((1, 0)))
+            network.add_point(Point((0, 1)))
+            self.assertRaises(AssertionError, network.add_link,
+                              Point((0, 0)), Point((0, 1)))
+
+            # and is not detected without validation.
+            validation.set_level(validation.OFF)
+            network.add_link(Point((1, 0)), Point((0, 1)))
+        finally:
+            validation.set_level(level)
+
+    def test_update(self):
+        network = UndirectedNetwork()
+        network.add_point(Point((0, 0)))
+        network.add_point(Point((1, 0)))
+        network.add_link(Point((0, 0)), Point((1, 0)))
+
+        other = UndirectedNetwork()
+        other.add_point(Point((1, 0)))
+        other.add_point(Point((1, 1)))
+        other.add_link(Point((1, 0)), Point((1, 1)))
+
+        network.update(other)
+
+        self.assertEqual(3, len(network))
+        self.assertEqual(2, len(network.links_list()))
+        self.assertEqual({Point((0, 0)), Point((1, 1))},
+                         network.links[Point((1, 0))])
+        # the updated network is not changed.
+        self.assertEqual(2, len(other))
+
+
+class TestPoint(unittest.TestCase):
+
+    def test_point(self):
+        point = Point((1, 2))
+
+        self.assertEqual(Point((1, 2)), point)
+        self.assertEqual(hash(Point((1, 2))), hash(point))
+        self.assertNotEqual(Point((2, 1)), point)
+        self.assertEqual((1, 2), tuple(point))
+        self.assertRaises(AttributeError, setattr, point, 'x', 2)
@@ -1,7 +1,9 @@
 import unittest
+from StringIO import StringIO
 
-from pt_law_parser.parser import parse_document
+from pt_law_parser.parser import parse_document, iter_document, read_meta
 
+from tests import setUpModule
 from tests.test_basic import TestDocument
 
 
@@ -121,3 +123,74 @@ class TestParser(TestDocument):
 
         self.assertEqual(13, len(device.titles))
         self.assertEqual(1, len(device.tables))
+
+    def test_write_html(self):
+        """
+        Writing the HTML to a file gives the same result as building it.
+        """
+        device = parse_document('tests/samples/137056.pdf')
+
+        f = StringIO()
+        device.write_html(f)
+
+        self.assertEqual(device.as_html().encode('utf-8'), f.getvalue())
+
+    def test_iter_document(self):
+        """
+        Iterating over the document gives the same elements as parsing it.
+        """
+        file_name = 'tests/samples/133880.pdf'
+        device = parse_document(file_name)
+
+        elements = list(iter_document(file_name))
+
+        self.assertEqual([element.__class__ for element in device.result],
+                         [element.__class__ for element in elements])
+        self.assertEqual([element.as_html() for element in device.result],
+                         [element.as_html() for element in elements])
+
+
+class TestParallelParser(unittest.TestCase):
+    """
+    Shows that parsing pages in parallel gives the same result as parsing them
+    sequentially.
+    """
+    def test_133880(self):
+        file_name = 'tests/samples/133880.pdf'
+        device = parse_document(file_name)
+        parallel_device = parse_document(file_name, processes=2)
+
+        self.assertEqual(device.meta.pages, parallel_device.meta.pages)
+        self.assertEqual(device.pageno, parallel_device.pageno)
+        self.assertEqual(len(device.titles), len(parallel_device.titles))
+        self.assertEqual(len(device.tables), len(parallel_device.tables))
+        self.assertEqual(device.as_html(), parallel_device.as_html())
+
+
+class TestReadMeta(unittest.TestCase):
+    """
+    Shows that reading the meta from the header gives the same meta as parsing
+    the document.
+    """
+    def assertSameMeta(self, file_name):
+        meta = read_meta(file_name)
+        expected = parse_document(file_name).meta
+
+        self.assertEqual(expected.series, meta.series)
+        self.assertEqual(expected.number, meta.number)
+        self.assertEqual(expected.date, meta.date)
+        self.assertEqual(expected.year, meta.year)
+        self.assertEqual(expected.version, meta.version)
+        self.assertEqual(expected.pages[:1], meta.pages)
+
+    def test_133880(self):
+        """
+        Document whose first pages are a cover and a summary.
+        """
+        self.assertSameMeta('tests/samples/133880.pdf')
+
+    def test_113604(self):
+        """
+        Document from 2000.
+        """
+        self.assertSameMeta('tests/samples/113604.pdf')
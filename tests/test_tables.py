@@ -1,9 +1,16 @@
+import random
 import unittest
 
 
-from pt_law_parser.layout import LTNetwork
+from pdfminer.layout import LTComponent
+
+from pt_law_parser.layout import LTNetwork, LTTextColumn, SortedColumns, \
+    snap_values
 from pt_law_parser.html import Table
 from pt_law_parser.point import Point
+from pt_law_parser.auxiliar import GridIndex
+
+from tests import setUpModule
 
 
 class TestCase(unittest.TestCase):
@@ -121,6 +128,36 @@ class TestCase(unittest.TestCase):
 
         self.assertEqual(6, len(table.cells))
 
+    def test_dangling_line(self):
+        """
+        A line that ends inside a cell does not split it.
+
+        2 *--*--*
+          |  |  |
+        1 |  *  |
+          |     |
+        0 *-----*
+          0  1  2
+        """
+        points = [Point((0, 0)), Point((2, 0)), Point((0, 2)), Point((2, 2)),
+                  Point((1, 2)), Point((1, 1))]
+
+        network = LTNetwork()
+        for point in points:
+            network.add_point(point)
+
+        network.add_link(points[0], points[1])
+        network.add_link(points[0], points[2])
+        network.add_link(points[1], points[3])
+        network.add_link(points[2], points[4])
+        network.add_link(points[4], points[3])
+        network.add_link(points[4], points[5])
+        network.add_collinear_links()
+
+        table = Table(network)
+
+        self.assertEqual([(0, 0, 2, 2)], [cell.bbox for cell in table.cells])
+
 
 class TestNetworkIntersections(unittest.TestCase):
     # todo: make more extensive tests:
@@ -143,6 +180,30 @@ class TestNetworkIntersections(unittest.TestCase):
         self.assertTrue(Point((1, 0)) in network)
         self.assertEqual(network.links[Point((1, 0))], set(points))
 
+    def test_multiple_intersection_points(self):
+        """
+        Two horizontal links crossing two vertical links, and a vertical link
+        touching a horizontal link on its end (not an intersection).
+        """
+        points = [Point((0, 1)), Point((5, 1)), Point((0, 3)), Point((5, 3)),
+                  Point((1, 0)), Point((1, 4)), Point((4, 0)), Point((4, 4)),
+                  Point((2, 3)), Point((2, 5))]
+
+        network = LTNetwork()
+        for point in points:
+            network.add_point(point)
+
+        for i in range(0, len(points), 2):
+            network.add_link(points[i], points[i + 1])
+
+        network._fix_intersections()
+
+        self.assertEqual(len(points) + 4, len(network))
+        self.assertEqual(network.links[Point((1, 3))],
+                         {Point((0, 3)), Point((4, 3)),
+                          Point((1, 1)), Point((1, 4))})
+        self.assertEqual(network.links[Point((2, 3))], {Point((2, 5))})
+
     def test_missing_intersection_links(self):
         points = [Point((0, 0)), Point((2, 0)),
                   Point((1, -1)), Point((1, 1)), Point((1, 0))]
@@ -158,3 +219,195 @@ class TestNetworkIntersections(unittest.TestCase):
 
         expected = points[:-1]
         self.assertEqual(network.links[Point((1, 0))], set(expected))
+
+    def test_collinear_links(self):
+        """
+        Points of a row linked in sequence become fully connected, but not
+        across a break of the sequence.
+        """
+        points = [Point((0, 0)), Point((1, 0)), Point((2, 0)), Point((4, 0)),
+                  Point((5, 0))]
+
+        network = LTNetwork()
+        for point in points:
+            network.add_point(point)
+
+        network.add_link(points[0], points[1])
+        network.add_link(points[1], points[2])
+        network.add_link(points[3], points[4])
+
+        network.add_collinear_links()
+
+        self.assertEqual(network.links[points[0]], {points[1], points[2]})
+        self.assertEqual(network.links[points[3]], {points[4]})
+
+
+class TestGridIndex(unittest.TestCase):
+
+    def test_candidates(self):
+        bboxes = [(0, 0, 5, 5), (5, 0, 9, 5), (0, 5, 9, 9), (1, 1, 1, 1)]
+        index = GridIndex(bboxes)
+
+        # the degenerated box is always a candidate.
+        self.assertEqual([0, 3], index.candidates((1, 1, 2, 2)))
+        # borders are included.
+        self.assertEqual([0, 1, 2, 3], index.candidates((5, 5, 5, 5)))
+        self.assertEqual([1, 2, 3], index.candidates((6, 4, 7, 6)))
+        self.assertEqual([3], index.candidates((10, 10, 11, 11)))
+
+
+class TestNetworkComponents(unittest.TestCase):
+
+    def test_get_components(self):
+        """
+        Two separated squares are two components.
+        """
+        network = LTNetwork()
+        for x0 in (0, 10):
+            points = [Point((x0, 0)), Point((x0 + 1, 0)),
+                      Point((x0 + 1, 1)), Point((x0, 1))]
+            for point in points:
+                network.add_point(point)
+            for i in range(4):
+                network.add_link(points[i - 1], points[i])
+
+        components = network._get_components()
+
+        self.assertEqual(2, len(components))
+        self.assertEqual([4, 4], [len(component) for component in components])
+        for component in components:
+            self.assertEqual(4, len(component.links_list()))
+            self.assertEqual(1, len(Table(component).cells))
+
+
+class TestNetworkDuplicates(unittest.TestCase):
+
+    def test_remove_duplicates(self):
+        """
+        Two links that almost touch each other (by 1 unit) become connected.
+        """
+        points = [Point((0, 0)), Point((10, 0)), Point((11, 1)), Point((11, 10)),
+                  Point((30, 30))]
+
+        network = LTNetwork()
+        for point in points:
+            network.add_point(point)
+
+        network.add_link(points[0], points[1])
+        network.add_link(points[2], points[3])
+
+        network._remove_duplicates()
+
+        self.assertEqual(4, len(network))
+        self.assertEqual(2, len(network.links_list()))
+        merged = [point for point in points[1:3] if point in network][0]
+        self.assertEqual({points[0], points[3]}, network.links[merged])
+
+
+def pairwise_replacements(histogram, distance):
+    """
+    The replacements of `snap_values` computed by comparing every pair of
+    values, as `LTNetwork._align_nodes` did.
+    """
+    replace = {}
+    for x in histogram:
+        for x_prime in histogram:
+            if x != x_prime and abs(x - x_prime) < distance:
+                if histogram[x_prime] > histogram[x]:
+                    replace[x] = x_prime
+                elif histogram[x_prime] == histogram[x]:
+                    if x > x_prime:
+                        replace[x] = x_prime
+                    else:
+                        replace[x_prime] = x
+                else:
+                    replace[x_prime] = x
+    return replace
+
+
+class TestNetworkAlignment(unittest.TestCase):
+
+    def test_snap_values(self):
+        # 11 snaps to 12, the last of its more common neighbours in the order
+        # of the histogram; 20 is as common as 22 and smaller; 30 is far from
+        # everything.
+        histogram = {10: 3, 11: 1, 12: 2, 20: 1, 22: 1, 30: 1}
+        self.assertEqual([10, 11, 12, 20, 22, 30], list(histogram))
+
+        self.assertEqual({11: 12, 12: 10, 22: 20}, snap_values(histogram, 5))
+
+    def test_snap_values_chain(self):
+        # 0 snaps to 4 and 4 snaps to 8, but 0 is too far from 8 to snap to it.
+        histogram = {0: 1, 4: 2, 8: 3}
+
+        self.assertEqual({0: 4, 4: 8}, snap_values(histogram, 5))
+
+    def test_snap_values_pairwise(self):
+        """
+        The replacements are the ones of comparing every pair of values.
+        """
+        generator = random.Random(0)
+        for _ in range(500):
+            histogram = {}
+            for _ in range(generator.randint(1, 30)):
+                value = generator.choice([generator.randint(0, 60),
+                                          generator.uniform(0, 60)])
+                histogram[value] = generator.randint(1, 4)
+
+            self.assertEqual(pairwise_replacements(histogram, 5),
+                             snap_values(histogram, 5))
+
+    def test_align_nodes(self):
+        """
+        A slightly tilted link becomes horizontal.
+        """
+        points = [Point((0, 0)), Point((10, 1)), Point((10, 0)),
+                  Point((10, 10))]
+
+        network = LTNetwork()
+        for point in points:
+            network.add_point(point)
+
+        network.add_link(points[0], points[1])
+        network.add_link(points[2], points[3])
+
+        network._align_nodes()
+
+        self.assertEqual(3, len(network))
+        self.assertEqual({Point((0, 0)), Point((10, 10))},
+                         network.links[Point((10, 0))])
+
+    def test_align_nodes_neighbours(self):
+        """
+        Each value snaps once, to the last of its more common (or as common
+        and smaller) neighbours: 1 to 0 and 2 to 1.
+        """
+        points = [Point((0, 0)), Point((1, 10)), Point((2, 20))]
+
+        network = LTNetwork()
+        for point in points:
+            network.add_point(point)
+
+        network._align_nodes()
+
+        self.assertEqual({Point((0, 0)), Point((0, 10)), Point((1, 20))},
+                         network.points)
+
+
+class TestSortedColumns(unittest.TestCase):
+
+    def test_update(self):
+        top, bottom = LTTextColumn(), LTTextColumn()
+        top.add(LTComponent((0, 10, 1, 11)))
+        bottom.add(LTComponent((0, 5, 1, 6)))
+
+        columns = SortedColumns()
+        columns.add(bottom)
+        columns.add(top)
+        self.assertEqual([top, bottom], list(columns))
+        self.assertEqual(1, columns.index_below(6))
+
+        # the top column grows below the bottom one.
+        top.add(LTComponent((0, 2, 1, 3)))
+        columns.update(top)
+        self.assertEqual([bottom, top], list(columns))